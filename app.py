@@ -2,15 +2,16 @@ import streamlit as st
 import re
 import time
 import pandas as pd
-import io
-import zipfile
 import tempfile
+import shutil
+import hashlib
 import os
 import logging
 import subprocess
 import sys
 import platform
 import asyncio
+import threading
 from pathlib import Path
 
 # Ensure asyncio subprocess support on Windows for Playwright
@@ -20,10 +21,18 @@ if platform.system() == "Windows":
 # Import automation functions
 from playwright.sync_api import sync_playwright
 from playwright_launcher import run
-from first_ignite import launch_first_ignite
+from first_ignite import launch_first_ignite, first_ignite_wait_report
 from formatting_functions import get_clean_id, format_summary
 from create_pdf import create_pdf
 from brightspot_functions import *
+from pipeline import Disclosure, run_pipeline, first_ignite_stage, pdf_stage, brightspot_stage
+from config import firstignite_workers, firstignite_tabs, pdf_workers, brightspot_workers, pipeline_queue_size, login_wait_seconds, summary_cache_refresh, resume_batch, job_poll_seconds, queue_upload_folder, app_journal_path
+from journal import Journal
+from route_filter import RouteStats, route_report
+from wait_functions import WaitLog
+from results_archive import ResultsArchive
+from jobs import job_runner
+from disclosure_queue import DisclosureQueue
 
 # --- 1. Session State Initialization ---
 def initialize_state():
@@ -33,12 +42,10 @@ def initialize_state():
         st.session_state.images = []
     if 'tags_df' not in st.session_state:
         st.session_state.tags_df = None
-    if 'run_automation' not in st.session_state:
-        st.session_state.run_automation = False
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
     if 'results' not in st.session_state:
         st.session_state.results = {}
-    if 'cancel_processing' not in st.session_state:
-        st.session_state.cancel_processing = False
     if 'playwright_installed' not in st.session_state:
         st.session_state.playwright_installed = False
 
@@ -92,6 +99,26 @@ def save_uploaded_file(uploaded_file, temp_dir):
         f.write(uploaded_file.getbuffer())
     return temp_path
 
+def save_queued_file(uploaded_file, queue_folder):
+    """Save an upload for the disclosure queue in a folder named after its hash and return the path.
+
+    The queue may not have worked through an earlier upload yet, so a new file with the same
+    name gets its own folder instead of overwriting it (the file name itself is kept for its ID).
+    """
+    data = uploaded_file.getbuffer()
+    file_folder = os.path.join(queue_folder, hashlib.sha256(data).hexdigest()[:16])
+    os.makedirs(file_folder, exist_ok=True)
+    file_path = os.path.join(file_folder, uploaded_file.name)
+    if not os.path.exists(file_path):
+        with open(file_path, "wb") as f:
+            f.write(data)
+    return file_path
+
+@st.cache_resource
+def get_disclosure_queue():
+    """The disclosure queue, opened once per server process instead of on every rerun."""
+    return DisclosureQueue()
+
 def get_error_message(func_name, error):
     """Convert function names to user-friendly error messages."""
     error_messages = {
@@ -128,190 +155,140 @@ def try_function(func, *args, sCleanID="", func_name="", **kwargs):
         return error_message
 
 # --- 3. Main Automation Function ---
-def run_automation_process(pdf_files, image_files, tag_df, progress_bar, status_text):
-    """Main automation process that runs the entire workflow."""
-    successes = []
+AUTOMATION_JOB = "automation" # only one automation job runs at a time, everyone else watches it
+
+def start_automation_job(pdf_files, image_files, tag_df, refresh_summaries=False, resume=False):
+    """Saves the uploaded files and starts the automation as a background job.
+
+    Returns (job, started). If an automation job is already running (started by anyone),
+    that job is returned instead and nothing new is started.
+    """
+    running = job_runner.latest(AUTOMATION_JOB)
+    if running is not None and running.active:
+        return running, False
+
+    # The job's files outlive this script run, so they go in a folder the job removes when it ends
+    temp_dir = tempfile.mkdtemp(prefix="tto-job-")
+    pdf_paths = {}
     failures = []
-    generated_sell_sheets = {}
-    
-    # Create temporary directory for files
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Save uploaded files to temp directory
-        pdf_paths = {}
-        image_paths = {}
-        
-        for pdf_file in pdf_files:
-            pdf_id = extract_id(pdf_file.name)
-            if pdf_id:
-                pdf_paths[pdf_id] = save_uploaded_file(pdf_file, temp_dir)
-        
-        for image_file in image_files:
-            image_id = extract_id(image_file.name)
-            if image_id:
-                image_paths[image_id] = save_uploaded_file(image_file, temp_dir)
-        
+    for pdf_file in pdf_files:
+        pdf_id = extract_id(pdf_file.name)
+        if pdf_id:
+            pdf_paths[pdf_id] = save_uploaded_file(pdf_file, temp_dir)
+        else:
+            failures.append((pdf_file.name, "Could not extract a valid ID from filename"))
+
+    for image_file in image_files:
+        image_id = extract_id(image_file.name)
+        if image_id:
+            save_uploaded_file(image_file, temp_dir)
+
+    job, started = job_runner.start(AUTOMATION_JOB, run_automation_process, pdf_paths, failures, temp_dir, refresh_summaries, resume)
+    if not started:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return job, started
+
+def run_automation_process(job, pdf_paths, failures, temp_dir, refresh_summaries=False, resume=False):
+    """Main automation process that runs the entire workflow (in a background job thread).
+
+    Progress goes to the job (see jobs.py), never to Streamlit directly. Disclosures that
+    FirstIgnite has already summarized are taken from the summary cache unless
+    refresh_summaries is True. Every step is recorded in the batch journal; with resume=True
+    the files the last batch already published are skipped. Resuming works per file, not per
+    step: the other files go through again (the sell sheets are remade and Brightspot starts
+    from the template). Returns the sell sheet archive.
+    """
+    generated_sell_sheets = ResultsArchive() # the ZIP is built as each file finishes
+    wait_log = WaitLog() # how long this job's steps waited
+    route_stats = RouteStats() # and how many requests its browsers didn't load
+    job.set_total(len(pdf_paths) + len(failures))
+
+    try:
+        # Files without an ID can't be processed
+        for file_name, error_msg in failures:
+            job.add_failure(file_name, error_msg, f"❌ {file_name}: {error_msg}")
+
         # Set up paths for PDF generation
         banner_path = "Images/banner.png"
         footer_banner_path = "Images/footer banner.png"
         export_folder = temp_dir
-        
-        # Use your existing playwright_launcher
-        with sync_playwright() as p:
-            browser, context, page = run(p)  # Use your existing launcher
-            
-            # Create tabs using the same context
-            firstignite_page = context.new_page()
-            firstignite_page.goto("https://app.firstignite.com/autopilot")
-            
-            brightspot_page = context.new_page()
-            brightspot_page.goto("https://brightspot.byu.edu/cms/logIn.jsp?returnPath=%2Fcms%2Findex.jsp")
-            
-            time.sleep(75)
-            st.success("✅ Login complete! Starting automation for all files...")
-            
-            # Process each PDF file
-            for i, pdf_file in enumerate(pdf_files):
-                if st.session_state.cancel_processing:
-                    break
-                
-                pdf_id = extract_id(pdf_file.name)
-                if not pdf_id:
-                    error_msg = "Could not extract a valid ID from filename"
-                    failures.append((pdf_file.name, error_msg))
-                    st.error(f"❌ {pdf_file.name}: {error_msg}")
-                    continue
-                
-                # Update progress
-                progress = (i + 1) / len(pdf_files)
-                progress_bar.progress(progress, f"Processing file {i + 1} of {len(pdf_files)}")
-                status_text.text(f"Processing: {pdf_file.name} ({pdf_id})")
-                
-                file_errors = []
-                current_step = 1
-                total_steps = 5
-                
-                try:
-                    # Step 1: FirstIgnite Data Extraction
-                    st.write(f"📄 **{pdf_id}** - Step {current_step}/{total_steps}: Extracting data from FirstIgnite...")
-                    current_step += 1
-                    
-                    extracted_summary = try_function(
-                        launch_first_ignite, firstignite_page, pdf_paths[pdf_id], 
-                        sCleanID=pdf_id, func_name="launch_first_ignite"
-                    )
-                    
-                    if isinstance(extracted_summary, str) and extracted_summary.startswith("Failed"):
-                        file_errors.append(extracted_summary)
-                        st.error(f"❌ {pdf_id}: {extracted_summary}")
-                        continue
-                    
-                    st.success(f"✅ {pdf_id}: FirstIgnite data extracted successfully")
-                    
-                    # Step 2: Data Formatting
-                    st.write(f"📄 **{pdf_id}** - Step {current_step}/{total_steps}: Formatting data...")
-                    current_step += 1
-                    
-                    formatted_data = try_function(
-                        format_summary, extracted_summary,
-                        sCleanID=pdf_id, func_name="format_summary"
-                    )
-                    
-                    if isinstance(formatted_data, str) and formatted_data.startswith("Failed"):
-                        file_errors.append(formatted_data)
-                        st.error(f"❌ {pdf_id}: {formatted_data}")
-                        continue
-                    
-                    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = formatted_data
-                    st.success(f"✅ {pdf_id}: Data formatted successfully")
-                    
-                    # Step 3: PDF Creation
-                    st.write(f"📄 **{pdf_id}** - Step {current_step}/{total_steps}: Creating PDF...")
-                    current_step += 1
-                    
-                    pdf_result = try_function(
-                        create_pdf, sTitle, pdf_id, sExecutiveStatement, sDescription, 
-                        lstAdvantages, lstProblemsSolved, lstMarketApplications,
-                        banner_path, footer_banner_path, export_folder,  # ← Added these 3 parameters
-                        sCleanID=pdf_id, func_name="create_pdf"
-                    )
-                    
-                    if isinstance(pdf_result, str) and pdf_result.startswith("Failed"):
-                        file_errors.append(pdf_result)
-                        st.error(f"❌ {pdf_id}: {pdf_result}")
-                        continue
-                    
-                    # Read the generated PDF
-                    pdf_path = os.path.join(export_folder, f"{pdf_id}_sell_sheet.pdf")
-                    if os.path.exists(pdf_path):
-                        with open(pdf_path, "rb") as f:
-                            pdf_bytes = f.read()
-                        generated_sell_sheets[f"sell_sheet_{pdf_id}.pdf"] = pdf_bytes
-                        st.success(f"✅ {pdf_id}: PDF created successfully")
-                    else:
-                        file_errors.append("PDF file was not created")
-                        st.error(f"❌ {pdf_id}: PDF file was not created")
-                        continue
-                    
-                    # Step 4: Brightspot Integration
-                    st.write(f"📄 **{pdf_id}** - Step {current_step}/{total_steps}: Processing in Brightspot...")
-                    current_step += 1
-                    
-                    # Brightspot functions with detailed error reporting
-                    brightspot_functions = [
-                        (bs_template_click, "bs_template_click", "Clicking template"),
-                        (bs_display_internal_name, "bs_display_internal_name", "Setting technology name", brightspot_page, sTitle, pdf_id),
-                        (bs_title_techID, "bs_title_techID", "Setting title and ID", brightspot_page, sTitle, pdf_id),
-                        (bs_executive_statement, "bs_executive_statement", "Setting executive statement", brightspot_page, sExecutiveStatement),
-                        (bs_technology_overview, "bs_technology_overview", "Setting technology overview", brightspot_page, sDescription),
-                        (bs_key_advantages, "bs_key_advantages", "Setting key advantages", brightspot_page, lstAdvantages),
-                        (bs_problems_addressed, "bs_problems_addressed", "Setting problems addressed", brightspot_page, lstProblemsSolved),
-                        (bs_market_applications, "bs_market_applications", "Setting market applications", brightspot_page, lstMarketApplications),
-                        (bs_additional_information, "bs_additional_information", "Setting additional information", brightspot_page, pdf_id),
-                        (bs_upload_pdf, "bs_upload_pdf", "Uploading PDF", brightspot_page, pdf_id, export_folder),
-                        (bs_year_tag, "bs_year_tag", "Setting year tag", brightspot_page, pdf_id),
-                        (bs_contact_link, "bs_contact_link", "Setting contact link", brightspot_page),
-                        (bs_override_description, "bs_override_description", "Setting override description", brightspot_page, pdf_id),
-                        (bs_publish, "bs_publish", "Publishing page", brightspot_page)
-                    ]
-                    
-                    brightspot_success = True
-                    for func_info in brightspot_functions:
-                        if len(func_info) == 3:
-                            func, func_name, step_desc = func_info
-                            st.write(f"📄 **{pdf_id}** - {step_desc}...")
-                            error = try_function(func, brightspot_page, sCleanID=pdf_id, func_name=func_name)
-                        else:
-                            func, func_name, step_desc, *args = func_info
-                            st.write(f"📄 **{pdf_id}** - {step_desc}...")
-                            error = try_function(func, *args, sCleanID=pdf_id, func_name=func_name)
-                        
-                        if isinstance(error, str) and error.startswith("Failed"):
-                            file_errors.append(error)
-                            st.error(f"❌ {pdf_id}: {error}")
-                            brightspot_success = False
-                            break
-                        else:
-                            st.success(f"✅ {pdf_id}: {step_desc} completed")
-                    
-                    # Step 5: Final Status
-                    st.write(f"📄 **{pdf_id}** - Step {current_step}/{total_steps}: Finalizing...")
-                    
-                    # Check if any errors occurred
-                    if file_errors:
-                        failures.append((pdf_file.name, " | ".join(file_errors)))
-                        st.error(f"❌ {pdf_id}: Processing failed")
-                    else:
-                        successes.append(pdf_id)
-                        st.success(f"✅ {pdf_id}: Processing completed successfully!")
-                        
-                except Exception as e:
-                    error_msg = f"Unexpected error: {str(e)}"
-                    failures.append((pdf_file.name, error_msg))
-                    st.error(f"❌ {pdf_id}: {error_msg}")
-            
-            browser.close()
-    
-    return successes, failures, generated_sell_sheets
+
+        disclosures = [Disclosure(pdf_path, pdf_id) for pdf_id, pdf_path in pdf_paths.items()]
+
+        # Records every step so an interrupted batch (browser crash, rerun) can be resumed
+        journal = Journal(app_journal_path) # its own journal, so a batch started from index.py doesn't wipe it
+        journal.start(resume=resume)
+        disclosures, published = journal.resume(disclosures)
+        for disclosure in published:
+            job.add_success(disclosure.sCleanID, f"✅ {disclosure.sCleanID}: Already published in the last batch, skipped")
+
+        # Runs FirstIgnite, PDF creation and Brightspot as separate stages (each with its own browser)
+        # so the next file is extracted while the current one is being entered into Brightspot
+        stages = [
+            first_ignite_stage(firstignite_workers, tabs=firstignite_tabs, refresh=refresh_summaries),
+            pdf_stage(pdf_workers, export_folder, banner_path, footer_banner_path, write_files=False), # the sell sheets stay in memory for the upload and the ZIP
+            brightspot_stage(brightspot_workers, stop_on_error=True),
+        ]
+
+        # Called in the job thread each time a file finishes, in whatever order they finish
+        def on_result(disclosure):
+            # Adds the sell sheet to the download even if Brightspot failed afterwards (and lets go of its bytes)
+            if disclosure.pdfBytes is not None:
+                generated_sell_sheets.add(f"sell_sheet_{disclosure.sCleanID}.pdf", disclosure.pdfBytes)
+                disclosure.pdfBytes = None
+
+            file_name = os.path.basename(disclosure.filePath)
+            if disclosure.errors:
+                file_errors = [get_error_message(func_name, error) for func_name, error in disclosure.errors]
+                job.add_failure(file_name, " | ".join(file_errors), f"❌ {disclosure.sCleanID}: {file_errors[0]}")
+            else:
+                job.add_success(disclosure.sCleanID, f"✅ {disclosure.sCleanID}: Processing completed successfully!")
+
+        if disclosures:
+            # the job's cancel_event stops the pipeline within seconds (the waits in progress give up too)
+            run_pipeline(disclosures, stages, queue_size=pipeline_queue_size, on_result=on_result, cancel_event=job.cancel_event, wait_log=wait_log, route_stats=route_stats)
+    finally:
+        generated_sell_sheets.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Reports how long FirstIgnite actually took compared to the old fixed 60 second sleep
+    waited_count, waited_seconds, saved_seconds = first_ignite_wait_report(wait_log)
+    if waited_count:
+        job.note(f"⏱️ FirstIgnite waited {waited_seconds:.0f}s over {waited_count} disclosure(s), {saved_seconds:.0f}s saved vs. a fixed 60s wait")
+    allowed_count, blocked_count, estimated_bytes, _ = route_report(route_stats)
+    if blocked_count:
+        job.note(f"🚫 Skipped {blocked_count} of {allowed_count + blocked_count} routed browser requests (images, fonts, video, trackers), an estimated {estimated_bytes / 1e6:.1f} MB")
+
+    return generated_sell_sheets
+
+@st.fragment(run_every=job_poll_seconds)
+def show_job_progress(job_id):
+    """Redraws the progress of a job every few seconds (without rerunning the whole page).
+
+    When the job ends its results are copied into this session and the page is rerun to show them.
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        return
+    snapshot = job.snapshot()
+    if snapshot["active"]:
+        progress = snapshot["done"] / snapshot["total"] if snapshot["total"] else 0
+        st.progress(progress, f"Finished {snapshot['done']} of {snapshot['total']} files ({snapshot['succeeded']} succeeded, {snapshot['failed']} failed)")
+        if snapshot["status"] == "cancelling":
+            st.warning("Cancelling - the files in progress are stopping...")
+        for kind, message in reversed(snapshot["events"]):
+            (st.success if kind == "success" else st.error)(message)
+    elif st.session_state.results.get("job_id") != job_id:
+        st.session_state.results = {
+            "job_id": job_id,
+            "status": snapshot["status"],
+            "error": snapshot["error"],
+            "successes": list(job.successes),
+            "failures": list(job.failures),
+            "notes": list(job.notes),
+            "sell_sheets": job.result,
+        }
+        st.rerun()
 
 # --- 4. The Streamlit User Interface ---
 st.set_page_config(layout="wide", page_title="TTO Automation Suite")
@@ -424,50 +401,68 @@ if st.session_state.pdfs:
         st.error(f"Please resolve the following issues before running: {', '.join(validation_errors)}")
 
     # Manual login instructions
-    st.info("""
-    **Important:** The browser will open with two tabs and you'll need to login to both services.
+    st.info(f"""
+    **Important:** Saved logins are reused and the browsers run in the background. A browser window only opens for a service whose login has expired.
     
-    1. **Brightspot Login**: Login to Brightspot in the first tab (used for all files)
-    2. **FirstIgnite Login**: Login to FirstIgnite in the second tab (used for all files)
-    3. **Don't close the browser** - the automation will continue automatically
-    4. **Each login has 60 seconds** - complete your login within this time
-    5. **After login, all files will be processed automatically**
+    1. **FirstIgnite Login**: If the FirstIgnite window shows a login page, log in there (used for all files)
+    2. **Brightspot Login**: If the Brightspot window shows a login page, log in there (used for all files)
+    3. **Don't close the browsers** - the automation starts as soon as both windows are logged in
+    4. **Each login has up to {login_wait_seconds} seconds** - complete your login within this time
+    5. **After login, files move through FirstIgnite, PDF creation and Brightspot at the same time**
     """)
 
+    # Cached FirstIgnite summaries are reused unless this is checked
+    refresh_summaries = st.checkbox("Refresh cached FirstIgnite summaries", value=summary_cache_refresh,
+                                    help="Files that were already summarized skip FirstIgnite. Check this to send every file to FirstIgnite again.")
+    # Continues the last batch if it was interrupted (files it already published are skipped)
+    resume = st.checkbox("Resume the last batch", value=resume_batch,
+                         help="Skips the files the last run already published. The rest go through again, with their summaries from the cache.")
+
+    # The automation runs as a background job (jobs.py), this page only starts, watches and cancels it
+    # a job someone else started is shown here too instead of starting a second one
+    job = job_runner.latest(AUTOMATION_JOB)
+    running = job is not None and job.active
+    if running:
+        st.session_state.job_id = job.id
+
     # Run button and cancel button
     col1, col2 = st.columns([3, 1])
     with col1:
-        if st.button("🚀 Run Automation", type="primary", use_container_width=True, disabled=not all_checks_passed):
-            st.session_state.run_automation = True
-            st.session_state.cancel_processing = False
+        if st.button("🚀 Run Automation", type="primary", use_container_width=True, disabled=not all_checks_passed or running):
+            job, started = start_automation_job(
+                st.session_state.pdfs,
+                st.session_state.images if include_images else [],
+                st.session_state.tags_df if include_tags else None,
+                refresh_summaries,
+                resume
+            )
+            if not started:
+                st.info("An automation job is already running, showing its progress instead.")
+            st.session_state.job_id = job.id
+            st.session_state.results = {}
+            running = True
     with col2:
-        if st.button("❌ Cancel", type="secondary", use_container_width=True):
-            st.session_state.cancel_processing = True
+        if st.button("❌ Cancel", type="secondary", use_container_width=True, disabled=not running):
+            job.cancel()
 
-    if st.session_state.run_automation:
-        # Create progress indicators
-        progress_bar = st.progress(0, "Starting Automation...")
-        status_text = st.empty()
-        
-        # Run the automation
-        successes, failures, generated_sell_sheets = run_automation_process(
-            st.session_state.pdfs,
-            st.session_state.images if include_images else [],
-            st.session_state.tags_df if include_tags else None,
-            progress_bar,
-            status_text
-        )
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Store results
-        st.session_state.results = {
-            "successes": successes, 
-            "failures": failures, 
-            "sell_sheets": generated_sell_sheets
-        }
+    if st.session_state.job_id and (running or st.session_state.results.get("job_id") != st.session_state.job_id):
+        show_job_progress(st.session_state.job_id)
+
+    # Instead of running them now, the files can go into the persistent queue (disclosure_queue.py)
+    # that queue workers work through overnight (python disclosure_queue.py work)
+    with st.expander("🗂️ Disclosure queue"):
+        disclosure_queue = get_disclosure_queue()
+        if st.button("➕ Add these PDFs to the queue", disabled=not all_checks_passed):
+            added = sum(disclosure_queue.enqueue(save_queued_file(pdf_file, queue_upload_folder), source="upload")
+                        for pdf_file in st.session_state.pdfs if extract_id(pdf_file.name))
+            st.success(f"Added {added} file(s) to the queue (files already in it are skipped)")
+        counts = disclosure_queue.counts()
+        st.caption(", ".join(f"{counts.get(status, 0)} {status}" for status in ("queued", "running", "failed", "done")))
+        backlog = disclosure_queue.backlog()
+        if backlog:
+            st.dataframe(pd.DataFrame([{"ID": row["clean_id"], "Status": row["status"], "Last step": row["stage"],
+                                        "Attempts": row["attempts"], "Last error": row["last_error"]} for row in backlog]),
+                         hide_index=True, use_container_width=True)
 
     # --- STAGE 4: RESULTS & DOWNLOAD ---
     if st.session_state.results:
@@ -475,7 +470,13 @@ if st.session_state.pdfs:
         st.header("Step 4: Results")
         
         results = st.session_state.results
+        if results["status"] == "cancelled":
+            st.warning("The automation was cancelled, the files that hadn't finished are listed as failed.")
+        elif results["status"] == "failed":
+            st.error(f"The automation stopped: {results['error']}")
         st.subheader(f"Automation Complete: {len(results['successes'])} Succeeded, {len(results['failures'])} Failed")
+        for note in results["notes"]:
+            st.info(note)
 
         if results["failures"]:
             st.error("Encountered the following errors:")
@@ -486,19 +487,16 @@ if st.session_state.pdfs:
         if results["sell_sheets"]:
             st.subheader("Download Sell Sheets")
             
-            # Create a zip file in memory
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                for filename, content in results["sell_sheets"].items():
-                    zf.writestr(filename, content)
-            
+            # The zip was built while the files finished (see results_archive.py)
+            archive = results["sell_sheets"]
+            st.caption(f"{len(archive)} sell sheet(s), {archive.size() / 1e6:.1f} MB")
             st.download_button(
                 label="⬇️ Download All Sell Sheets (.zip)",
-                data=zip_buffer.getvalue(),
+                data=archive.read(), # the same bytes on every rerun (Streamlit keeps a download in memory either way)
                 file_name="sell_sheets.zip",
                 mime="application/zip",
                 use_container_width=True
             )
 
         st.markdown("---")
-        st.info("To start a new automation, please refresh this page (F5 or Cmd+R).")
+        st.info("To start a new automation, upload the next files and press Run Automation again.")
@@ -0,0 +1,101 @@
+# BATCH RENDER
+    # Renders sell sheets in a pool of processes instead of one at a time, create_pdf is pure CPU work and needs no browser
+    # so regenerating the whole catalog (after a banner or template change) can use every core
+    #   iter_render(summaries)   -> yields (sCleanID, path or PDF bytes, error) in the order the sheets finish
+    #   render_all(summaries)    -> (results, errors) dictionaries keyed by ID
+    #   cached_summaries()       -> the (sCleanID, fields) of every summary in the summary cache
+    # summaries are (sCleanID, fields) pairs where fields is the format_summary tuple
+    # each process loads the fonts and banners once (pdf_assets) and reuses them for every sheet it renders
+    # run it directly to regenerate every sell sheet in the summary cache:
+    #     python batch_render.py --out "Exported Sell Sheets"
+
+# IMPORTS
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from create_pdf import create_pdf
+from formatting_functions import get_clean_id
+from config import export_folder, render_workers, summary_cache_folder
+
+
+# Renders one sell sheet (runs in a worker process), returns its path or, with as_bytes, the PDF itself
+def render_sheet(sCleanID, fields, export_folder, banner_path, footer_banner_path, as_bytes):
+    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = fields
+    if as_bytes:
+        return create_pdf(sTitle, sCleanID, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved,
+                          lstMarketApplications, banner_path, footer_banner_path, as_bytes=True)
+    create_pdf(sTitle, sCleanID, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved,
+               lstMarketApplications, banner_path, footer_banner_path, export_folder)
+    return os.path.join(export_folder, f"{sCleanID}_sell_sheet.pdf")
+
+
+# Renders every summary in a process pool, yields (sCleanID, result, error) as each sheet finishes
+    # result is the path of the sell sheet (or its bytes with as_bytes=True), error is the exception if it failed
+    # workers=0 uses one process per CPU core
+def iter_render(summaries, workers=render_workers, export_folder=export_folder, banner_path="Images/banner.png",
+                footer_banner_path="Images/footer banner.png", as_bytes=False):
+    if not as_bytes:
+        os.makedirs(export_folder, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or None) as executor:
+        futures = {
+            executor.submit(render_sheet, sCleanID, fields, export_folder, banner_path, footer_banner_path, as_bytes): sCleanID
+            for sCleanID, fields in summaries
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
+# Renders every summary and returns (results, errors), both dictionaries keyed by ID
+def render_all(summaries, workers=render_workers, export_folder=export_folder, as_bytes=False):
+    results, errors = {}, {}
+    for sCleanID, result, error in iter_render(summaries, workers, export_folder, as_bytes=as_bytes):
+        if error is not None:
+            errors[sCleanID] = str(error)
+            logging.warning(f"{sCleanID} - create_pdf failed: {str(error)}")
+        else:
+            results[sCleanID] = result
+    return results, errors
+
+
+# The (sCleanID, fields) of every parsed summary in the summary cache (the newest one when an ID is in it more than once)
+    # expired entries are included, regenerating doesn't need FirstIgnite to be up to date
+def cached_summaries(folder=summary_cache_folder):
+    newest = {} # sCleanID -> (saved, fields)
+    if not os.path.isdir(folder):
+        return []
+    for sName in os.listdir(folder):
+        if not sName.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folder, sName), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not entry.get("fields"):
+            continue
+        sCleanID = get_clean_id(entry.get("fileName", ""))
+        if sCleanID and entry.get("saved", 0) >= newest.get(sCleanID, (0, None))[0]:
+            newest[sCleanID] = (entry.get("saved", 0), tuple(entry["fields"]))
+    return [(sCleanID, fields) for sCleanID, (saved, fields) in sorted(newest.items())]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename='error_log.txt', filemode='a', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Regenerate every sell sheet in the summary cache")
+    parser.add_argument("--out", default=export_folder, help="folder the sell sheets are written to")
+    parser.add_argument("--workers", type=int, default=render_workers, help="processes to render with (0 = one per CPU core)")
+    args = parser.parse_args()
+
+    summaries = cached_summaries()
+    start = time.perf_counter()
+    results, errors = render_all(summaries, args.workers, args.out)
+    print(f"Rendered {len(results)} of {len(summaries)} sell sheet(s) into {args.out} in {time.perf_counter() - start:.1f}s")
+    for sCleanID, sError in errors.items():
+        print(f"  {sCleanID}: {sError}")
@@ -0,0 +1,77 @@
+# CREATE_PDF BENCHMARK
+    # Times create_pdf per sell sheet with the fonts and banner images loaded once per process (pdf_assets)
+    # against fpdf loading them again for every sheet, which is what create_pdf used to do
+    # --no-pkl parses the TTF fonts instead of reading their .pkl metrics (what happens when the .pkl can't be read or written)
+    # run it from the repository folder:
+    #     python benchmarks/bench_create_pdf.py --sheets 50
+
+# IMPORTS
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fpdf.fpdf
+from create_pdf import create_pdf
+import pdf_assets
+
+SAMPLE = (
+    "Self-Healing Concrete Additive",
+    "2024-123",
+    "A low-cost additive that lets concrete seal its own cracks, extending the life of roads and bridges.",
+    "Concrete cracks as it ages and lets in water and salt. This additive releases a mineral that fills cracks as they form.\n"
+    "In tests the treated samples recovered most of their strength after cracking.",
+    ["Seals cracks up to 0.5 mm wide", "Mixes in with standard equipment", "Costs less than current sealants"],
+    ["Water damage to reinforcing steel", "Frequent road and bridge repairs"],
+    ["Road and bridge construction", "Precast concrete", "Repair mortars"],
+)
+
+
+# Makes create_pdf call fpdf's own add_font and image for every sheet, the way it did before the registry
+@contextmanager
+def unshared():
+    add_font, image = pdf_assets.add_font, pdf_assets.image
+    pdf_assets.add_font = lambda pdf, family, style, fname: pdf.add_font(family, style, fname, uni=True)
+    pdf_assets.image = lambda pdf, name, **kwargs: pdf.image(name, **kwargs)
+    try:
+        yield
+    finally:
+        pdf_assets.add_font, pdf_assets.image = add_font, image
+
+
+# Renders `sheets` sell sheets, returns the average seconds per sheet
+def time_sheets(sheets, export_folder):
+    create_pdf(*SAMPLE, export_folder=export_folder) # warms up the disk cache (and the registry when it is used)
+    start = time.perf_counter()
+    for i in range(sheets):
+        create_pdf(*SAMPLE, export_folder=export_folder)
+    return (time.perf_counter() - start) / sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time create_pdf with and without the shared font and image registry")
+    parser.add_argument("--sheets", type=int, default=20, help="sell sheets to render in each mode")
+    parser.add_argument("--no-pkl", action="store_true", help="parse the TTF fonts instead of reading their .pkl metrics")
+    args = parser.parse_args()
+
+    if args.no_pkl:
+        fpdf.fpdf.FPDF_CACHE_MODE = 1 # fpdf's "don't cache metrics" mode
+
+    with tempfile.TemporaryDirectory() as export_folder:
+        with unshared():
+            before = time_sheets(args.sheets, export_folder)
+        pdf_assets.pdf_assets.clear()
+        after = time_sheets(args.sheets, export_folder)
+
+    print(f"{args.sheets} sell sheets{' (fonts parsed from the TTFs)' if args.no_pkl else ''}")
+    print(f"  loading fonts and images per sheet: {before * 1000:8.1f} ms/sheet")
+    print(f"  shared registry:                    {after * 1000:8.1f} ms/sheet")
+    print(f"  saved:                              {(before - after) * 1000:8.1f} ms/sheet ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
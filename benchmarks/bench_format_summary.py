@@ -0,0 +1,83 @@
+# FORMAT_SUMMARY BENCHMARK
+    # Times format_summary's section parser (formatting_functions.summary_sections) against the greedy regex it replaced
+    # over well formed summaries and malformed ones (a missing, misspelled or repeated heading), at a few text lengths
+    # the regex backtracks over the whole text before it gives up on a malformed summary, so its time grows with the
+    # length of the text (and how many times a heading repeats), the parser scans the text once either way
+    # run it from the repository folder:
+    #     python benchmarks/bench_format_summary.py --runs 200
+
+# IMPORTS
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting_functions import summary_sections
+
+SUMMARY_REGEX = "Title:(.+)Category:(.+)Executive Statement:(.+)Description:(.+)Key Advantages:(.+)Problems Solved:(.+)Market Applications:(.+)"
+
+# One summary as the FirstIgnite editor gives it (text_content() runs the paragraphs together), {filler} pads the description
+SUMMARY = (
+    "Title: Self-Healing Concrete Additive"
+    "Category: Materials"
+    "Executive Statement: A low-cost additive that lets concrete seal its own cracks, extending the life of roads and bridges."
+    "Description: Concrete cracks as it ages and lets in water and salt. This additive releases a mineral that fills cracks as they form.{filler}"
+    "Key Advantages: Seals cracks up to 0.5 mm wideMixes in with standard equipmentCosts less than current sealants"
+    "Problems Solved: Water damage to reinforcing steelFrequent road and bridge repairs"
+    "Market Applications: Road and bridge constructionPrecast concreteRepair mortars"
+)
+FILLER = " In tests the treated samples recovered most of their strength after cracking."
+
+
+# (name, text) for every summary in the corpus, each kind at 1x, 10x and 100x the description filler
+def corpus():
+    for iRepeat in (1, 10, 100):
+        sText = SUMMARY.format(filler=FILLER * iRepeat)
+        yield f"well formed x{iRepeat}", sText
+        yield f"no Market Applications x{iRepeat}", sText.replace("Market Applications:", "Market Applications -")
+        yield f"misspelled Category x{iRepeat}", sText.replace("Category:", "Catagory:")
+        yield f"repeated headings x{iRepeat}", sText.replace(FILLER, FILLER + " Key Advantages: Description:")
+
+
+def regex_sections(sText):
+    return list(re.findall(SUMMARY_REGEX, sText)[0])
+
+
+# Average seconds per call, a parse that fails counts the same as one that succeeds
+def time_parse(parse, sText, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        try:
+            parse(sText)
+        except (IndexError, ValueError):
+            pass
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time format_summary's section parser against the old regex")
+    parser.add_argument("--runs", type=int, default=200, help="calls per summary")
+    args = parser.parse_args()
+
+    print(f"{'summary':32} {'chars':>7} {'regex':>10} {'parser':>10}")
+    for sName, sText in corpus():
+        try:
+            sections = regex_sections(sText)
+        except IndexError:
+            sections = None
+        try:
+            parsed = summary_sections(sText)
+        except ValueError:
+            parsed = None
+        if sections != parsed:
+            print(f"{sName}: the parser and the regex disagree")
+        fRegex = time_parse(regex_sections, sText, args.runs)
+        fParser = time_parse(summary_sections, sText, args.runs)
+        print(f"{sName:32} {len(sText):7} {fRegex * 1e6:8.1f}us {fParser * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# SELL SHEET SIZE REPORT
+    # Renders a sample sell sheet and says how its bytes split between the embedded fonts, the images and the rest
+    # (fpdf embeds a subset of each NotoSans font with only the glyphs the sheet uses, this shows how big those subsets are)
+    # run it from the repository folder:
+    #     python benchmarks/pdf_size.py
+
+# IMPORTS
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from create_pdf import create_pdf
+from bench_create_pdf import SAMPLE
+
+FONT_TTF_FILES = ["Fonts/NotoSans-Regular.ttf", "Fonts/NotoSans-Bold.ttf"]
+
+
+# What one PDF object is, from its dictionary
+def object_kind(sObject):
+    if "/Length1" in sObject:
+        return "embedded fonts"
+    if "/Subtype /Image" in sObject:
+        return "images"
+    return "page content and structure"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as export_folder:
+        create_pdf(*SAMPLE, export_folder=export_folder)
+        with open(os.path.join(export_folder, f"{SAMPLE[1]}_sell_sheet.pdf"), "rb") as f:
+            data = f.read()
+
+    kinds = {}
+    for sObject in re.split(rb"\n(?=\d+ 0 obj)", data):
+        kind = object_kind(sObject[:300].decode("latin1"))
+        kinds[kind] = kinds.get(kind, 0) + len(sObject)
+
+    iFullFonts = sum(os.path.getsize(path) for path in FONT_TTF_FILES)
+    print(f"Sell sheet: {len(data) / 1000:.1f} KB")
+    for kind, iBytes in sorted(kinds.items(), key=lambda kind: -kind[1]):
+        print(f"  {kind:28} {iBytes / 1000:8.1f} KB ({iBytes / len(data) * 100:.0f}%)")
+    print(f"  (the full NotoSans TTFs would be {iFullFonts / 1000:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
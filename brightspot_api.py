@@ -0,0 +1,170 @@
+# BRIGHTSPOT API
+    # Creates and publishes a Technology page over Brightspot's GraphQL content management endpoint
+    # instead of filling the form in a browser (brightspot_functions.py)
+    # it sends the same content the bs_* steps type in (from the format_summary fields) in three kinds of requests:
+    #   UploadFile          -> uploads the sell sheet (and the image) as a file, returns its id and url
+    #   FindTag             -> looks up the id of a tag by its name (Tech 2024, Engineering, ...)
+    #   SaveTechnologyPage  -> creates the page with every field and publishes it
+    # every request is a POST of {"operationName", "query", "variables"} with the API client headers
+    # EXPERIMENTAL: the operations below are what the endpoint is expected to look like, they haven't been run against Brightspot yet
+    # the query text has to match the schema Brightspot generates for the endpoint, brightspot_standin_server.py checks each
+    # request against the schema it assumes (its SCHEMA), compare that with the real endpoint's schema before switching over
+    # pick it with brightspot_backend = "api" in config.py (pipeline.brightspot_stage switches to it)
+
+# IMPORTS
+import base64
+import mimetypes
+import os
+import re
+from datetime import datetime
+
+import requests
+
+from config import brightspot_api_url, brightspot_api_client_id, brightspot_api_client_secret
+
+UPLOAD_FILE_QUERY = """
+mutation UploadFile($fileName: String!, $contentType: String!, $data: String!) {
+  uploadFile(fileName: $fileName, contentType: $contentType, data: $data) { id url }
+}
+"""
+
+FIND_TAG_QUERY = """
+query FindTag($name: String!) {
+  tag(name: $name) { id name }
+}
+"""
+
+SAVE_TECHNOLOGY_PAGE_QUERY = """
+mutation SaveTechnologyPage($page: TechnologyPageInput!, $publish: Boolean!) {
+  saveTechnologyPage(page: $page, publish: $publish) { id permalink published }
+}
+"""
+
+
+# Raised when Brightspot answers with an HTTP error or a GraphQL error
+class BrightspotAPIError(Exception):
+    pass
+
+
+# One connection to the Brightspot endpoint (keeps the HTTP connection open between requests)
+    # a requests.Session isn't safe to share between threads, so every pipeline worker makes its own
+class BrightspotAPI:
+    def __init__(self, url=brightspot_api_url, client_id=brightspot_api_client_id, client_secret=brightspot_api_client_secret, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"X-Client-ID": client_id, "X-Client-Secret": client_secret})
+        self.tags = {} # tag name -> id, tags don't change during a batch
+
+    # Sends one operation and returns its data, raises BrightspotAPIError if anything went wrong
+    def call(self, operationName, query, variables):
+        try:
+            response = self.session.post(self.url, json={"operationName": operationName, "query": query, "variables": variables}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise BrightspotAPIError(f"{operationName} failed: {e}") from e
+        if response.status_code >= 400:
+            raise BrightspotAPIError(f"{operationName} failed with HTTP {response.status_code}: {response.text[:200]}")
+        body = response.json()
+        if body.get("errors"):
+            raise BrightspotAPIError(f"{operationName} failed: " + "; ".join(error.get("message", str(error)) for error in body["errors"]))
+        return body.get("data") or {}
+
+    # Uploads a file, returns {"id", "url"}
+        # content -> the file's bytes when they are already in memory (filePath then only gives the name)
+    def upload_file(self, filePath, content=None):
+        if content is None:
+            with open(filePath, "rb") as f:
+                content = f.read()
+        data = base64.b64encode(content).decode("ascii")
+        contentType = mimetypes.guess_type(filePath)[0] or "application/octet-stream"
+        return self.call("UploadFile", UPLOAD_FILE_QUERY, {"fileName": os.path.basename(filePath), "contentType": contentType, "data": data})["uploadFile"]
+
+    # Returns the id of a tag (None if Brightspot doesn't have it)
+    def find_tag(self, name):
+        if name not in self.tags:
+            tag = self.call("FindTag", FIND_TAG_QUERY, {"name": name}).get("tag")
+            self.tags[name] = tag["id"] if tag else None
+        return self.tags[name]
+
+    # Saves the page and (by default) publishes it, returns {"id", "permalink", "published"}
+    def save_technology_page(self, page, publish=True):
+        return self.call("SaveTechnologyPage", SAVE_TECHNOLOGY_PAGE_QUERY, {"page": page, "publish": publish})["saveTechnologyPage"]
+
+
+# --- PAGE CONTENT ---
+# the same text the bs_* steps put into the form, as the rich text HTML Brightspot stores
+
+def html_escape(sText):
+    return sText.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+def html_paragraphs(sText):
+    return "".join(f"<p>{html_escape(line.strip())}</p>" for line in sText.split("\n") if line.strip())
+
+def html_bullets(lstItems):
+    return "<ul>" + "".join(f"<li>{html_escape(item.strip())}</li>" for item in lstItems if item.strip()) + "</ul>"
+
+# The additional information section with "Download the Sell Sheet here" linked to the uploaded sell sheet (bs_additional_information + bs_upload_pdf)
+def additional_information_html(sCleanID, sSellSheetUrl):
+    date_published = datetime.now().strftime("%d %B, %Y")  # Example: "21 April, 2025"
+    return (f"<p>Technology ID: {html_escape(sCleanID)}</p>"
+            f"<p>Sell Sheet: <a href=\"{html_escape(sSellSheetUrl)}\">Download the Sell Sheet here</a></p>"
+            "<p>Market Analysis: Contact us for a more in-depth market report</p>"
+            f"<p>Date Published: {date_published}</p>")
+
+# The year tag of a technology, from the year in its ID (bs_year_tag)
+def year_tag(sCleanID):
+    match = re.search(r"(20\d\d)", sCleanID)
+    return f"Tech {match.group(1)}" if match else None
+
+
+# Builds the TechnologyPageInput for one disclosure
+    # fields -> the format_summary tuple, sell_sheet -> the uploaded sell sheet, image -> the uploaded image (or None)
+def technology_page(sCleanID, fields, sell_sheet, tag_ids, image=None):
+    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = fields
+    sTitle = sTitle.strip()
+    page = {
+        "displayName": sTitle,
+        "internalName": f"{sTitle} ID: {sCleanID}",
+        "title": f"<h2>{html_escape(sTitle)} ID: {html_escape(sCleanID)}</h2>",
+        "executiveStatement": f"<h4>{html_escape(sExecutiveStatement.strip())}</h4>",
+        "technologyOverview": html_paragraphs(sDescription),
+        "keyAdvantages": html_bullets(lstAdvantages),
+        "problemsAddressed": html_bullets(lstProblemsSolved),
+        "marketApplications": html_bullets(lstMarketApplications),
+        "additionalInformation": additional_information_html(sCleanID, sell_sheet["url"]),
+        "sellSheet": sell_sheet["id"],
+        "tags": [tag_id for tag_id in tag_ids if tag_id],
+        "contactLink": f"https://techtransfer.byu.edu/contact?technology-id={sTitle} ID: {sCleanID}", # bs_contact_link
+        "promoDescription": f"ID: {sCleanID}", # bs_override_description
+    }
+    if image:
+        page["mainImage"] = image["id"]
+        page["promoImage"] = image["id"]
+    return page
+
+
+# Creates and publishes the Technology page for one disclosure (what the whole bs_* workflow does in the browser)
+    # returns the saved page {"id", "permalink", "published"}
+    # on_step(func_name) is called after each part finishes (the pipeline records them in the journal)
+    # pdfBytes -> the sell sheet from create_pdf(as_bytes=True), otherwise it is read from exportFolder
+def publish_technology(api, sCleanID, fields, exportFolder, tagTypeSelections=None, include_images=False, on_step=None, pdfBytes=None):
+    on_step = on_step or (lambda func_name: None)
+
+    sell_sheet = api.upload_file(os.path.join(exportFolder or "", f"{sCleanID}_sell_sheet.pdf"), pdfBytes)
+    on_step("bs_upload_pdf")
+
+    image = None
+    if include_images:
+        image = api.upload_file(os.path.join("Images", f"{sCleanID} image.jpeg"))
+        on_step("bs_image_main_page")
+
+    tag_ids = [api.find_tag(year_tag(sCleanID))] if year_tag(sCleanID) else []
+    sTypeTag = (tagTypeSelections or {}).get(sCleanID, "Select One")
+    if sTypeTag != "Select One":
+        tag_ids.append(api.find_tag(sTypeTag))
+
+    saved = api.save_technology_page(technology_page(sCleanID, fields, sell_sheet, tag_ids, image))
+    if not saved.get("published"):
+        raise BrightspotAPIError(f"{sCleanID} was saved but not published")
+    on_step("bs_publish")
+    return saved
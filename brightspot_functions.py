@@ -17,9 +17,30 @@
 
 
 from datetime import datetime # to get the current day and time to put in the additional information section
-from time import sleep
 import re
 import os
+from urllib.parse import urlparse
+from wait_functions import wait_until, wait_for_visible, wait_for_editor, wait_for_upload, wait_for_response # waits on the CMS instead of fixed sleeps
+from editor_functions import link_text, select_option # selects text and dropdown options without key presses
+
+BRIGHTSPOT_LOGIN_URL = "https://brightspot.byu.edu/cms/logIn.jsp?returnPath=%2Fcms%2Findex.jsp"
+BRIGHTSPOT_HOME_URL = "https://brightspot.byu.edu/cms/index.jsp"
+BRIGHTSPOT_CONTENT_STATE_PATH = "/cms/contentState" # the edit form posts here whenever a field changes
+
+
+# True for the POST that a Brightspot publish button sends (the form submits the button named "action-publish")
+def is_publish_response(response):
+    request = response.request
+    return request.method == "POST" and b"action-publish" in (request.post_data_buffer or b"")
+
+# True for the POST the edit form sends to save its state after an item picked from a search (a tag, for example) is filled in
+def is_cms_update_response(response):
+    request = response.request
+    return request.method == "POST" and urlparse(response.url).path.startswith(BRIGHTSPOT_CONTENT_STATE_PATH)
+
+# True once the browser is back inside the CMS (not on the Brightspot or BYU login pages)
+def in_cms(page):
+    return "/cms/" in page.url and "logIn.jsp" not in page.url
 
 # LOGS INTO BRIGHTSPOT
 def bs_login(page, userUsername, userPassword) :
@@ -27,17 +48,23 @@ def bs_login(page, userUsername, userPassword) :
     # For security reasons, it's better to use environment variables
 
     page.get_by_role("link", name="Log in to BYU", exact=True).click()
-    sleep(3)
-    if page.get_by_role("textbox", name="Net ID").is_visible(timeout=3000):
-        page.get_by_role("textbox", name="Net ID").fill(userUsername)
+
+    # waits for either the BYU sign in form or a redirect straight back into the CMS (already signed in)
+    net_id = page.get_by_role("textbox", name="Net ID")
+    wait_until(page, lambda: net_id.is_visible() or in_cms(page), timeout=30, description="the BYU sign in page")
+    if net_id.is_visible():
+        net_id.fill(userUsername)
         page.get_by_role("textbox", name="Password").fill(userPassword)
         page.get_by_role("button", name="Sign In").click()
-        sleep(3)
+        # waits until it is back in the CMS (leaves time to approve Duo if it asks)
+        wait_until(page, lambda: in_cms(page), timeout=120, description="Brightspot after signing in (approve Duo if prompted)")
 
 # Selects the TEMPLATE
 def bs_template_click(page) :
     page.get_by_role("link", name="Technology Page Template").click()
-    sleep(4)
+    # waits until the content form and its rich text editors are loaded
+    wait_for_visible(page.get_by_role("textbox", name="Display Name"), description="the Technology Page form")
+    wait_for_editor(page, page.locator(".ProseMirror").first, description="the Technology Page editors")
 
 # Changes the DISPLAY and INTERNAL name 
 def bs_display_internal_name(page, sTitle, sCleanID) :
@@ -56,12 +83,11 @@ def bs_title_techID(page, sTitle, sCleanID) :
 def bs_executive_statement(page, sExecutiveStatement) :
     page.locator(".is-collapsed > .repeatableLabel").first.click()
     page.mouse.wheel(0,500) # scrolls so it can find the next locator
-    sleep(2)
     # page.locator("bsp-line").nth(2).click()
-    page.locator("li:nth-child(2) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer > .ProseMirror").fill(f"{sExecutiveStatement}")
-    sleep(1)
-    page.locator("li:nth-child(2) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer > .ProseMirror").press("ControlOrMeta+Shift+ArrowUp")
-    sleep(1)
+    editor = page.locator("li:nth-child(2) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer > .ProseMirror")
+    wait_for_editor(page, editor, description="the executive statement editor")
+    editor.fill(f"{sExecutiveStatement}")
+    editor.press("ControlOrMeta+Shift+ArrowUp")
     page.get_by_role("link", name="H4").nth(2).click()
 
 # Inserts the IMAGE on the MAIN PAGE
@@ -76,13 +102,13 @@ def bs_image_main_page(page, sCleanID) :
     page.locator("bsp-image").get_by_text("Edit").click()
     page.get_by_role("link", name="technology placeholder image").click()
     page.get_by_role("button", name="New Image").click()
-    sleep(3) # so it can load
+    choose = page.get_by_role("textbox", name="Choose")
+    wait_for_visible(choose, description="the image upload form") # so it can load
     
     # Upload file
-    page.get_by_role("textbox", name="Choose").set_input_files(image_path)
-    sleep(10)
-    page.locator("form").filter(has_text=f"New Image: {sCleanID}-image").locator("button[name=\"action-publish\"]").click() # NOT WORKING
-    sleep(10)
+    wait_for_upload(page, lambda: choose.set_input_files(image_path), description=f"{sCleanID} image upload")
+    publish_button = page.locator("form").filter(has_text=f"New Image: {sCleanID}-image").locator("button[name=\"action-publish\"]")
+    wait_for_response(page, publish_button.click, is_publish_response, description=f"{sCleanID} image publish") # NOT WORKING
     page.get_by_text("Back", exact=True).click()
     page.get_by_role("link", name=f"{sCleanID}-image.jpeg", exact=True).click()
     page.get_by_role("button", name="Save & Close").click()
@@ -132,31 +158,38 @@ def bs_additional_information(page, sCleanID) :
     date_published = datetime.now().strftime("%d %B, %Y")  # Example: "21 April, 2025"
     page.locator("li:nth-child(16) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer > .ProseMirror").fill(f"Technology ID: {sCleanID}\nSell Sheet: Download the Sell Sheet here\nMarket Analysis: Contact us for a more in-depth market report\nDate Published: {date_published}")
 
+# What the attachment form's file input is given for a sell sheet
+    # the PDF itself when create_pdf kept it in memory (pdfBytes), otherwise the file in exportFolder
+def sell_sheet_file(sCleanID, exportFolder, pdfBytes=None):
+    sFileName = f"{sCleanID}_sell_sheet.pdf"
+    if pdfBytes is not None:
+        return {"name": sFileName, "mimeType": "application/pdf", "buffer": pdfBytes}
+    return os.path.join(exportFolder, sFileName)
+
 # Inserts the PDF SELL SHEET
-def bs_upload_pdf(page, sCleanID, exportFolder) :
-    # moves the cursor and highlights the corresponding text "Download the Sell Sheet here"
-    for iCount in range(0, 91) : # moves the cursor
-        page.get_by_text(f"Technology ID: {sCleanID}Sell").press("ArrowLeft")
-    
-    for iCount in range (0, 29) : # highlights the text
-        page.get_by_text(f"Technology ID: {sCleanID}Sell").press("Shift+ArrowLeft")
+def bs_upload_pdf(page, sCleanID, exportFolder, pdfBytes=None) :
+    # highlights the text "Download the Sell Sheet here" in the additional information and opens the link editor on it
+    sSection = "li:nth-child(16) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer"
+    link_text(page.locator(f"{sSection} > .ProseMirror"),
+              page.locator(f"{sSection} > .ProseMirrorToolbar > ul > li:nth-child(24) > .brightspot-core-link-LinkRichTextElement"),
+              "Download the Sell Sheet here")
 
     # Uploads the PDF and links it
-    page.locator("li:nth-child(16) > .objectInputs > div:nth-child(3) > div:nth-child(2) > .ProseMirrorContainer > .ProseMirrorToolbar > ul > li:nth-child(24) > .brightspot-core-link-LinkRichTextElement").click()
     page.get_by_role("link", name="(Required) search").click()
-    page.locator("div").filter(has_text=re.compile(r"^Article$")).nth(2).click()
-    page.get_by_role("textbox", name="Search", exact=True).press("ArrowDown")
-    page.get_by_role("textbox", name="Search", exact=True).press("Enter")
+    # switches the content type of the search from Article to Attachment
+    select_option(page, page.locator("div").filter(has_text=re.compile(r"^Article$")).nth(2), "Attachment",
+                  selected=page.locator("div").filter(has_text=re.compile(r"^Attachment$")).first)
     page.get_by_role("button", name="New").click()
-    sleep(3)
-    page.get_by_role("textbox", name="Choose").set_input_files(os.path.join(exportFolder, f"{sCleanID}_sell_sheet.pdf"))
-    sleep(10)
-    page.locator("form").filter(has_text=f"New Attachment: {sCleanID}-sell").locator("button[name=\"action-publish\"]").click()
-    sleep(5)
+    choose = page.get_by_role("textbox", name="Choose")
+    wait_for_visible(choose, description="the attachment upload form")
+    wait_for_upload(page, lambda: choose.set_input_files(sell_sheet_file(sCleanID, exportFolder, pdfBytes)), description=f"{sCleanID} sell sheet upload")
+    publish_button = page.locator("form").filter(has_text=f"New Attachment: {sCleanID}-sell").locator("button[name=\"action-publish\"]")
+    wait_for_response(page, publish_button.click, is_publish_response, description=f"{sCleanID} sell sheet publish")
     page.get_by_text("Back", exact=True).click()
-    sleep(3)
     firstNum, lastNum = sCleanID.split('-') # splits the sCleanID so I can get the last digits to be able to link it
-    page.get_by_role("link", name=f"-{lastNum}-sell-sheet.pdf").first.click()
+    sell_sheet_link = page.get_by_role("link", name=f"-{lastNum}-sell-sheet.pdf").first
+    wait_for_visible(sell_sheet_link, description="the uploaded sell sheet in the attachment list")
+    sell_sheet_link.click()
     page.get_by_role("button", name="Save & Close").click()
 
 # Inserts the YEAR TAG
@@ -166,18 +199,20 @@ def bs_year_tag(page, sCleanID) :
     yearTag = next((year for year in years if year in sCleanID), None)
 
     # Chooses the tags
-    page.get_by_role("link", name="search Tech 2024: Tag").click(timeout=300*10000)
-    page.get_by_role("link", name="chevron_right").click(timeout=300*10000)
-    page.get_by_role("link", name=f"Tech {yearTag}: Tag").click(timeout=300*10000)
-    sleep(10) # so it can publish
+    page.get_by_role("link", name="search Tech 2024: Tag").click(timeout=30000)
+    page.get_by_role("link", name="chevron_right").click(timeout=30000)
+    year_link = page.get_by_role("link", name=f"Tech {yearTag}: Tag")
+    wait_for_response(page, lambda: year_link.click(timeout=30000), is_cms_update_response,
+                      description="the year tag to save") # so it can publish
 
 def bs_type_tag(page, sCleanID, tagTypeSelections) :
     sTypeTag = tagTypeSelections.get(sCleanID, "Select one")
     if sTypeTag != "Select One" :
         page.get_by_role("link", name="add Add Item").click()
         page.get_by_role("link", name="search", exact=True).first.click()
-        sleep(12) # so it can load
-        page.get_by_role("link", name=sTypeTag, exact=False).click() 
+        tag_link = page.get_by_role("link", name=sTypeTag, exact=False).first
+        wait_for_visible(tag_link, description=f"the {sTypeTag} tag") # so it can load
+        tag_link.click()
         page.get_by_title("Close", exact=True).click()
 
 # Inserts the CONTACT LINK
@@ -188,34 +223,32 @@ def bs_contact_link(page) :
 
     # Step 2: Expand Aside/Below if the Rich Text card is not visible
     page.mouse.wheel(0,500) # scrolls so it can find the next locator
-    sleep(2)
     rich_text = page.get_by_text("Rich Text: (RichText Card)")
+    aside_heading = page.get_by_role("heading", name="Aside/Below keyboard_arrow_up")
+    wait_until(page, lambda: rich_text.is_visible() or aside_heading.is_visible(), timeout=10,
+               description="the Rich Text card or the Aside/Below heading")
     if not rich_text.is_visible():
-        page.get_by_role("heading", name="Aside/Below keyboard_arrow_up").locator("div").click()
-        sleep(1)
+        aside_heading.locator("div").click()
+        wait_for_visible(rich_text, description="the Rich Text card")
 
     # Step 3: Open Rich Text card
-    page.get_by_text("Rich Text: (RichText Card)").click(timeout=10000)
-    sleep(1)
+    rich_text.click(timeout=10000)
 
     # Step 4: Click Contact Us link and open editor
     page.mouse.wheel(0,500) # scrolls so it can find the next locator
-    sleep(1)
     page.get_by_role("link", name="Contact Us").click(timeout=10000)
     page.locator(".ProsemirrorEnhancementMenu-container-button").first.click(timeout=10000)
-    sleep(1)
 
-    # Step 5: Set link type to External
-    page.get_by_text("InternalInternalExternal").click()
-    search_box = page.get_by_role("textbox", name="Search", exact=True)
-    search_box.press("ArrowDown")
-    search_box.press("Enter")
-    sleep(1)
+    # Step 5: Set link type to External (the URL field only shows up for External links)
+    link_type = page.get_by_text("InternalInternalExternal")
+    wait_for_visible(link_type, description="the link editor")
+    url_box = page.get_by_role("textbox", name="URL")
+    select_option(page, link_type, "External", selected=url_box)
 
     # Step 6: Fill in the URL
-    page.get_by_role("textbox", name="URL").fill(fullLink)
+    url_box.fill(fullLink)
     page.get_by_role("button", name="Save & Close").click(timeout=10000)
-    sleep(3)
+    wait_for_visible(url_box, state="hidden", description="the link editor to close")
 
 # Inserts the OVERRIDE DESCRIPTION
 def bs_override_description(page, sCleanID):
@@ -243,45 +276,29 @@ def bs_override_image(page, sCleanID) :
     page.get_by_role("link").filter(has_text=sCleanID).first.click()
 
 # PUBLISHES the page
-def bs_publish(page) :
-    page.get_by_role("button", name="Publish").click()
-    sleep(10)
-    page.close()
+    # close=False leaves the page open (when it came from a PagePool, which resets it for the next disclosure)
+def bs_publish(page, close=True) :
+    # waits for the CMS to answer the publish instead of a fixed 10 seconds
+    wait_for_response(page, page.get_by_role("button", name="Publish").click, is_publish_response, timeout=120, description="the technology page publish")
+    if close:
+        page.close()
 
 # SEARCHES for the technology
 def bs_search_technology(page, sCleanID) :
     
     page.get_by_role("textbox", name="search Search").click()
     page.get_by_role("textbox", name="search Search").type(f"{sCleanID}")
-    sleep(1)
-
-    tried = False
-    # Tries to change the search type to Page
-    # If it didn't work, then it tries the second method
-    try: 
-        page.get_by_role("combobox", name="Type").click()
-        for iCount in range (0, 17) : # highlights the text
-            page.get_by_role("textbox", name="Search", exact=True).press("ArrowDown")
-        sleep(1)
-    except :
-        tried = True
-        sleep(1)
-
-    # Second attempt using a different page.get_by_role
-    if tried == True :
-        page.get_by_role("combobox", name="Type").locator("div").nth(1).click()
-        for iCount in range (0, 17) : # highlights the text
-            page.get_by_role("textbox", name="Search", exact=True).press("ArrowDown")
-        sleep(1)
-
-    # Selects it by pressing enter
-    page.get_by_role("textbox", name="Search", exact=True).press("Enter")
-    sleep(3)
+    wait_for_visible(page.get_by_role("row").filter(has_text=sCleanID).first, timeout=10,
+                     description=f"{sCleanID} in the search results")
+
+    # Changes the search type to Page (select_option waits until the Type box shows Page)
+    select_option(page, page.get_by_role("combobox", name="Type"), "Page")
 
     # Clears the search box and types in the ID again to load the results
     page.get_by_role("textbox", name="search Search").fill("")
     page.get_by_role("textbox", name="search Search").type(f"{sCleanID}")
-    sleep(2)
+    result_row = page.get_by_role("row", name=sCleanID)
+    wait_for_visible(result_row, description=f"{sCleanID} in the search results")
     
     # Selects the technology ID from the search results
-    page.get_by_role("row", name=sCleanID).get_by_role("link").nth(1).click()
+    result_row.get_by_role("link").nth(1).click()
@@ -0,0 +1,249 @@
+# BRIGHTSPOT STAND-IN SERVER
+    # A small local server that answers the requests brightspot_api.py sends, for testing and timing the API backend offline
+    # it keeps everything in memory and picks what to do from the operationName of each request
+    #   UploadFile -> stores the file, FindTag -> looks up (or makes) a tag, SaveTechnologyPage -> stores the page
+    # the query text is checked against SCHEMA first (the operation, its variables, the root field, its arguments and
+    # the fields selected), the way a GraphQL server validates a request before running it, so a query brightspot_api.py
+    # sends with a typo or a wrong type fails here too
+    # SCHEMA is the schema brightspot_api.py assumes, not one read from Brightspot: compare it with the real endpoint's
+    # schema (Admin > APIs > the endpoint > Schema) before using brightspot_backend = "api"
+    # GET /pages returns every saved page as JSON so a run can be checked
+    # run it directly and point the API backend at it:
+    #     python brightspot_standin_server.py 8765
+    #     BRIGHTSPOT_API_URL=http://127.0.0.1:8765/graphql BRIGHTSPOT_CLIENT_ID=test BRIGHTSPOT_CLIENT_SECRET=test python index.py
+
+# IMPORTS
+import base64
+import json
+import re
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The fields SaveTechnologyPage needs before it will publish a page
+REQUIRED_PAGE_FIELDS = ["displayName", "internalName", "title", "executiveStatement", "technologyOverview",
+                        "keyAdvantages", "problemsAddressed", "marketApplications", "additionalInformation", "sellSheet"]
+
+
+# The operations of the endpoint: operation type -> {root field: ({argument: type}, type it returns)}
+SCHEMA = {
+    "query": {
+        "tag": ({"name": "String!"}, "Tag"),
+    },
+    "mutation": {
+        "uploadFile": ({"fileName": "String!", "contentType": "String!", "data": "String!"}, "File"),
+        "saveTechnologyPage": ({"page": "TechnologyPageInput!", "publish": "Boolean!"}, "TechnologyPageResult"),
+    },
+}
+# The fields a query can select on each type it gets back
+OBJECT_FIELDS = {
+    "File": {"id", "url"},
+    "Tag": {"id", "name"},
+    "TechnologyPageResult": {"id", "permalink", "published"},
+}
+# The fields an input object can have
+INPUT_FIELDS = {
+    "TechnologyPageInput": set(REQUIRED_PAGE_FIELDS) | {"tags", "contactLink", "promoDescription", "mainImage", "promoImage"},
+}
+
+GRAPHQL_TOKEN = re.compile(r"[{}()\[\]:!]|\$?[_A-Za-z][_0-9A-Za-z]*")
+
+
+# Raised when a request doesn't match SCHEMA
+class GraphQLValidationError(ValueError):
+    pass
+
+
+# Splits an operation with one root field into (operation type, name, {variable: type}, root field, {argument: variable}, [selected fields])
+    # only the shape brightspot_api.py sends is understood: no fragments, aliases, literals or nested selections
+def parse_operation(query):
+    tokens = GRAPHQL_TOKEN.findall(query)
+    position = 0
+
+    def take(expected=None):
+        nonlocal position
+        if position >= len(tokens):
+            raise GraphQLValidationError("Unexpected end of the query")
+        token = tokens[position]
+        if expected is not None and token != expected:
+            raise GraphQLValidationError(f"Expected '{expected}' but found '{token}'")
+        position += 1
+        return token
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    operation_type, name = take(), take()
+    variables = {}
+    if peek() == "(":
+        take("(")
+        while peek() != ")":
+            variable = take()
+            if not variable.startswith("$"):
+                raise GraphQLValidationError(f"Expected a variable but found '{variable}'")
+            take(":")
+            type_tokens = []
+            while peek() not in (")", None) and not peek().startswith("$"):
+                type_tokens.append(take())
+            variables[variable[1:]] = "".join(type_tokens)
+        take(")")
+    take("{")
+    field = take()
+    arguments = {}
+    if peek() == "(":
+        take("(")
+        while peek() != ")":
+            argument = take()
+            take(":")
+            arguments[argument] = take().lstrip("$")
+        take(")")
+    selection = []
+    take("{")
+    while peek() != "}":
+        selection.append(take())
+    take("}")
+    take("}")
+    if peek() is not None:
+        raise GraphQLValidationError(f"Only one root field is supported, found '{peek()}'")
+    return operation_type, name, variables, field, arguments, selection
+
+
+# Checks a request against SCHEMA, raises GraphQLValidationError with what doesn't match
+def validate_request(body):
+    operation_type, name, variables, field, arguments, selection = parse_operation(body.get("query") or "")
+    if name != body.get("operationName"):
+        raise GraphQLValidationError(f"operationName {body.get('operationName')} doesn't match the query's name {name}")
+    if field not in SCHEMA.get(operation_type, {}):
+        raise GraphQLValidationError(f"Cannot query field '{field}' on type '{operation_type}'")
+    argument_types, return_type = SCHEMA[operation_type][field]
+    for argument, variable in arguments.items():
+        if argument not in argument_types:
+            raise GraphQLValidationError(f"Unknown argument '{argument}' on field '{field}'")
+        if variables.get(variable) != argument_types[argument]:
+            raise GraphQLValidationError(f"Variable '${variable}' of type '{variables.get(variable)}' used where '{argument_types[argument]}' is expected")
+    missing = [argument for argument, sType in argument_types.items() if sType.endswith("!") and argument not in arguments]
+    if missing:
+        raise GraphQLValidationError(f"Field '{field}' is missing the required argument(s) {', '.join(missing)}")
+    unknown = [selected for selected in selection if selected not in OBJECT_FIELDS[return_type]]
+    if unknown:
+        raise GraphQLValidationError(f"Cannot query field(s) {', '.join(unknown)} on type '{return_type}'")
+
+    values = body.get("variables") or {}
+    for variable, sType in variables.items():
+        if sType.endswith("!") and values.get(variable) is None:
+            raise GraphQLValidationError(f"Variable '${variable}' of required type '{sType}' was not provided")
+        input_fields = INPUT_FIELDS.get(sType.rstrip("!"))
+        if input_fields is not None and isinstance(values.get(variable), dict):
+            extra = [key for key in values[variable] if key not in input_fields]
+            if extra:
+                raise GraphQLValidationError(f"Field(s) {', '.join(extra)} are not defined by type '{sType.rstrip('!')}'")
+
+
+# Everything the server has been sent
+class StandinState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {} # id -> {"fileName", "contentType", "size"}
+        self.tags = {} # name -> id
+        self.pages = {} # id -> page
+
+
+# One request, answered from the server's StandinState
+class StandinHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass # keeps the console quiet during benchmarks
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/pages":
+            with self.server.state.lock:
+                self.send_json(200, list(self.server.state.pages.values()))
+        else:
+            self.send_json(404, {"errors": [{"message": f"Unknown path {self.path}"}]})
+
+    def do_POST(self):
+        if not self.headers.get("X-Client-ID") or not self.headers.get("X-Client-Secret"):
+            self.send_json(401, {"errors": [{"message": "Missing X-Client-ID/X-Client-Secret"}]})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            operation = OPERATIONS[body["operationName"]]
+        except (ValueError, KeyError) as e:
+            self.send_json(400, {"errors": [{"message": f"Bad request: {e}"}]})
+            return
+        try:
+            validate_request(body)
+        except GraphQLValidationError as e:
+            self.send_json(400, {"errors": [{"message": str(e)}]})
+            return
+        try:
+            data = operation(self.server.state, body.get("variables") or {})
+        except ValueError as e:
+            self.send_json(200, {"data": None, "errors": [{"message": str(e)}]})
+            return
+        self.send_json(200, {"data": data})
+
+
+# --- OPERATIONS ---
+
+def upload_file(state, variables):
+    data = base64.b64decode(variables["data"])
+    if not data:
+        raise ValueError(f"{variables['fileName']} is empty")
+    sId = uuid.uuid4().hex
+    with state.lock:
+        state.files[sId] = {"fileName": variables["fileName"], "contentType": variables["contentType"], "size": len(data)}
+    return {"uploadFile": {"id": sId, "url": f"/files/{sId}/{variables['fileName']}"}}
+
+def find_tag(state, variables):
+    with state.lock:
+        sId = state.tags.setdefault(variables["name"], uuid.uuid4().hex)
+    return {"tag": {"id": sId, "name": variables["name"]}}
+
+def save_technology_page(state, variables):
+    page = variables["page"]
+    missing = [field for field in REQUIRED_PAGE_FIELDS if not page.get(field)]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    with state.lock:
+        if page["sellSheet"] not in state.files:
+            raise ValueError(f"Unknown sell sheet {page['sellSheet']}")
+        sId = uuid.uuid4().hex
+        slug = "".join(c if c.isalnum() else "-" for c in page["displayName"].lower()).strip("-")
+        saved = {"id": sId, "permalink": f"/technologies/{slug}", "published": bool(variables.get("publish"))}
+        state.pages[sId] = {**page, **saved}
+    return {"saveTechnologyPage": saved}
+
+OPERATIONS = {
+    "UploadFile": upload_file,
+    "FindTag": find_tag,
+    "SaveTechnologyPage": save_technology_page,
+}
+
+
+# Starts the server in a background thread, returns (server, url of the endpoint)
+    # port=0 picks a free port, server.shutdown() stops it
+def start_standin(port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+    server.state = StandinState()
+    threading.Thread(target=server.serve_forever, name="brightspot-standin", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/graphql"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+    server.state = StandinState()
+    print(f"Brightspot stand-in listening on http://127.0.0.1:{port}/graphql (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -47,4 +47,134 @@ banner_path = "C:/Users/justi/Desktop/Desktop/Justin/Coding Projects/Automation/
 footer_banner_path = "C:/Users/justi/Desktop/Desktop/Justin/Coding Projects/Automation/Images/footer banner.png"  # Ensure the correct path
 
 # The folder where the exported sell sheets will be saved
-export_folder = r"C:\Users\justi\Desktop\Desktop\Justin\Coding Projects\Automation\Exported Sell Sheets"
\ No newline at end of file
+export_folder = r"C:\Users\justi\Desktop\Desktop\Justin\Coding Projects\Automation\Exported Sell Sheets"
+# Whether the pipeline also writes every sell sheet to its export folder
+# (they are kept in memory for the upload either way, False never touches the disk, for read-only or small tmpfs hosts)
+write_sell_sheets = True
+
+# --- PIPELINE SETTINGS ---
+# Number of workers for each stage of the pipeline (every FirstIgnite and Brightspot worker opens its own browser)
+firstignite_workers = 1
+pdf_workers = 1
+brightspot_workers = 1
+
+# How many FirstIgnite autopilot tabs each FirstIgnite worker keeps running at once
+# (FirstIgnite does most of its work on its own server, so several tabs in one browser finish much sooner than one)
+firstignite_tabs = 3
+
+# How many disclosures can wait in front of each stage before the stage before it pauses
+pipeline_queue_size = 2
+
+# Number of worker processes (each with its own browsers) shard_coordinator.py splits a large folder into
+shard_count = 2
+
+# --- BROWSER SESSION SETTINGS ---
+# How the automation browsers keep their FirstIgnite/Brightspot logins between runs
+#   "storage_state" -> saves the cookies and local storage of the logged in browsers to storage_state_path and loads them next run
+#   "profile"       -> keeps a persistent Chromium profile for every browser in browser_profile_folder
+#                      (its own folder, not chrome_user_data_path, so the automation never touches your own Chrome profile)
+#   "fresh"         -> starts with an empty browser every run (log in every time)
+browser_session_mode = "storage_state"
+storage_state_path = "auth_state.json"
+browser_profile_folder = "browser_profiles"
+
+# Seconds to leave for a manual login when the saved session has expired
+login_wait_seconds = 75
+
+# --- SUMMARY CACHE SETTINGS ---
+# FirstIgnite summaries are saved in summary_cache_folder (keyed by the hash of the disclosure PDF)
+# so a re-run skips FirstIgnite for every disclosure it has already summarized
+use_summary_cache = True
+summary_cache_folder = "summary_cache"
+# Cached summaries older than this many days are fetched from FirstIgnite again
+summary_cache_days = 30
+# True -> ignore the cache and get every summary from FirstIgnite again (the new summaries replace the cached ones)
+summary_cache_refresh = False
+
+# --- JOURNAL SETTINGS ---
+# Every finished step of every disclosure is appended here so an interrupted batch can be resumed (see journal.py)
+# each entry point has its own journal, a new batch in one of them must not wipe what the others can resume
+journal_path = "batch_journal.jsonl" # index.py
+app_journal_path = "app_batch_journal.jsonl" # app.py
+shard_journal_path = "shard_{shard}_batch_journal.jsonl" # shard_coordinator.py, one per shard ({shard} is its number)
+# True -> continue the last batch in the entry point's journal instead of starting a new one
+# (per disclosure: the published ones are skipped, the rest go through again with their cached summaries, see journal.py)
+resume_batch = False
+
+# --- BRIGHTSPOT BACKEND SETTINGS ---
+# How the technology pages are entered into Brightspot
+#   "browser" -> fills in the form in a browser with the bs_* steps (brightspot_functions.py)
+#   "api"     -> EXPERIMENTAL: creates and publishes the page over Brightspot's GraphQL content management endpoint (brightspot_api.py)
+#                its queries have only been checked against the schema brightspot_standin_server.py assumes, not the real endpoint's
+brightspot_backend = "browser"
+brightspot_api_url = os.environ.get("BRIGHTSPOT_API_URL", "https://brightspot.byu.edu/graphql/management/technology")
+# The API client is set up under Admin > APIs in Brightspot, keep the secret in an environment variable
+brightspot_api_client_id = os.environ.get("BRIGHTSPOT_CLIENT_ID", "")
+brightspot_api_client_secret = os.environ.get("BRIGHTSPOT_CLIENT_SECRET", "")
+
+# --- ROUTE FILTER SETTINGS ---
+# Blocks the requests the automation never needs in every browser it opens (see route_filter.py)
+use_route_filter = True
+route_rules = {
+    # every site: trackers and video hosts are always blocked, the BYU login and Duo pages never are
+    "default": {
+        "block_types": ["image", "media", "font"],
+        "block_domains": ["google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+                          "facebook.net", "connect.facebook.net", "hotjar.com", "segment.io", "segment.com", "clarity.ms",
+                          "intercom.io", "intercomcdn.com", "fullstory.com", "youtube.com", "vimeo.com", "linkedin.com"],
+        "allow_domains": ["duosecurity.com", "cas.byu.edu", "api.byu.edu"],
+    },
+    "firstignite.com": {"block_types": ["image", "media", "font"]},
+    # the CMS shows its icons with an icon font and the image steps pick images from their thumbnails, so only video is blocked
+    "brightspot.byu.edu": {"block_types": ["media"]},
+    "techtransfer.byu.edu": {"block_types": ["image", "media", "font"]},
+}
+
+# --- HEADLESS SETTINGS ---
+# Whether the automation browsers open a window
+#   "auto"   -> headless when a saved login exists (see browser_session_mode), with a window only when someone has to log in
+#   "always" -> always headless (unattended runs, a login that has expired fails instead of waiting)
+#   "never"  -> always with a window
+headless_mode = "auto"
+
+# --- PAGE POOL SETTINGS ---
+# Most pages (tabs) each Brightspot/FirstIgnite worker keeps open (the FirstIgnite tab pool uses firstignite_tabs)
+page_pool_size = 1
+# A page is closed and replaced after this many disclosures, or once its JavaScript heap passes page_max_heap_mb
+# (keeps the browsers' memory flat over long batches, 0 turns the check off)
+page_max_uses = 25
+page_max_heap_mb = 300
+
+# --- BATCH RENDER SETTINGS ---
+# Processes batch_render.py renders sell sheets with (0 = one per CPU core)
+render_workers = 0
+
+# --- RESULTS ARCHIVE SETTINGS ---
+# MB of the sell sheet ZIP app.py keeps in memory while it is being built before moving it to a temporary file on disk
+# (the finished ZIP is read back into memory once for the download, Streamlit serves downloads from memory)
+results_spool_mb = 16
+
+# --- JOB SETTINGS ---
+# How often (seconds) the app redraws the progress of a running automation job
+job_poll_seconds = 2
+# How many of the latest finished files the progress shows
+job_event_count = 10
+# How many finished jobs are remembered (their results stay downloadable until then)
+job_history = 20
+
+# --- DISCLOSURE QUEUE SETTINGS ---
+# The SQLite database of disclosure_queue.py (the backlog every entry point adds to and every queue worker works through)
+queue_db_path = "disclosure_queue.db"
+# The journal the queue workers record every step in, keyed by queue entry (separate from journal_path and app_journal_path)
+queue_journal_path = "queue_batch_journal.jsonl"
+# index.py adds its files to the queue and works through it instead of running them directly
+use_disclosure_queue = False
+# Where the app keeps the files it adds to the queue (they have to outlive the upload), one folder per file hash
+queue_upload_folder = "queued_disclosures"
+# A disclosure that fails this many times stays failed (python disclosure_queue.py retry puts them back)
+queue_max_attempts = 3
+# How many disclosures a worker claims and runs through the pipeline at once, and how often (seconds) it checks an empty queue
+queue_batch_size = 10
+queue_poll_seconds = 30
+# How long a claimed disclosure belongs to its worker without any progress before another worker can take it over
+queue_lease_minutes = 120
@@ -5,6 +5,7 @@
 # imports pdf functionality
 from fpdf import FPDF
 import os
+import pdf_assets # loads the fonts and banner images once per process instead of once per sell sheet
 
 # Modify the bullet point sections to use multi_cell instead of cell
 def add_bulleted_section(pdf, section_title, items):
@@ -31,8 +32,19 @@ def add_bulleted_section(pdf, section_title, items):
         # Add a small extra line break between bullet points
         pdf.ln(2)
 
+# The path of a disclosure's sell sheet in export_folder
+def sell_sheet_path(sCleanID, export_folder):
+    return os.path.join(export_folder, f"{sCleanID}_sell_sheet.pdf")
+
+# Writes a sell sheet made with as_bytes=True to export_folder (returns export_folder like create_pdf)
+def save_sell_sheet(sCleanID, pdfBytes, export_folder):
+    with open(sell_sheet_path(sCleanID, export_folder), "wb") as f:
+        f.write(pdfBytes)
+    return export_folder
+
 # creates the function
-def create_pdf(sTitle, sCleanID, sExectutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications, banner_path="Images/banner.png", footer_banner_path="Images/footer banner.png", export_folder="."):
+    # as_bytes=True returns the PDF itself instead of writing it to export_folder (nothing touches the disk)
+def create_pdf(sTitle, sCleanID, sExectutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications, banner_path="Images/banner.png", footer_banner_path="Images/footer banner.png", export_folder=".", as_bytes=False):
     # creates the pdf
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -43,8 +55,8 @@ def create_pdf(sTitle, sCleanID, sExectutiveStatement, sDescription, lstAdvantag
     noto_sans_r = "Fonts/NotoSans-Regular.ttf"
     noto_sans_b = "Fonts/NotoSans-Bold.ttf"
     
-    pdf.add_font("NotoSans", "", noto_sans_r,  uni=True)
-    pdf.add_font("NotoSans", "B", noto_sans_b, uni=True)  # Bold version
+    pdf_assets.add_font(pdf, "NotoSans", "", noto_sans_r)
+    pdf_assets.add_font(pdf, "NotoSans", "B", noto_sans_b)  # Bold version
     
 
     # pulls and assigns variables
@@ -57,7 +69,7 @@ def create_pdf(sTitle, sCleanID, sExectutiveStatement, sDescription, lstAdvantag
     lstMarketApplications = lstMarketApplications
 
     # Insert banner image at the top
-    pdf.image(banner_path, x=0, y=0, w=210)  # Adjust width to fit A4 page
+    pdf_assets.image(pdf, banner_path, x=0, y=0, w=210)  # Adjust width to fit A4 page
     
     # Set overlay text on the banner
     pdf.set_xy(0, 15)  # Adjust position for overlay text
@@ -107,10 +119,14 @@ def create_pdf(sTitle, sCleanID, sExectutiveStatement, sDescription, lstAdvantag
     pdf.ln(2.5)  # Space after section
 
     # Insert footer banner image at the bottom
-    pdf.image(footer_banner_path, x=0, y=pdf.get_y(), w=210)  # Adjust width to fit A4 page
+    pdf_assets.image(pdf, footer_banner_path, x=0, y=pdf.get_y(), w=210)  # Adjust width to fit A4 page
     
+    # Returns the PDF (fpdf keeps it as a latin-1 string)
+    if as_bytes:
+        return pdf.output(dest='S').encode('latin1')
+
     # Save the PDF
-    output_path = os.path.join(export_folder, f"{sCleanID}_sell_sheet.pdf")
+    output_path = sell_sheet_path(sCleanID, export_folder)
     pdf.output(output_path)
     
     return export_folder
@@ -0,0 +1,299 @@
+# DISCLOSURE QUEUE
+    # A durable queue of disclosures in a SQLite database, so work survives restarts and every entry point shares one backlog
+    # it is fed by index.py (use_disclosure_queue in config.py), the app's "Add to the queue" button, or a watched folder,
+    # and drained by one or more long-running workers (each claims a few disclosures at a time and runs them through the pipeline)
+    # every disclosure is one row: its ID, the SHA-256 of the file, its status (queued, running, done, failed),
+    # the last pipeline step it finished, how many attempts it has had and the last error
+    # a worker that dies leaves its rows "running" until their lease runs out, then another worker picks them up
+    # (the queue's own journal, queue_journal_path, lets it continue from the last step that can be picked up again)
+    # the journal is keyed by queue entry and the time it was (re)queued, not by ID, so a revised PDF of a published ID
+    # or a disclosure put back with "add --again" runs every step again
+    # run it directly:
+    #     python disclosure_queue.py add <file or folder> ...   adds disclosures
+    #     python disclosure_queue.py work [--watch FOLDER]      works through the queue (and keeps adding new PDFs in FOLDER)
+    #     python disclosure_queue.py status                     shows the backlog
+
+# IMPORTS
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from formatting_functions import get_clean_id
+from summary_cache import file_hash
+from config import (queue_db_path, queue_journal_path, queue_max_attempts, queue_batch_size, queue_poll_seconds, queue_lease_minutes,
+                    firstignite_workers, firstignite_tabs, pdf_workers, brightspot_workers, pipeline_queue_size)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS disclosures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clean_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_hash TEXT NOT NULL UNIQUE,
+    source TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    worker TEXT,
+    lease_until REAL,
+    enqueued REAL,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS disclosures_status ON disclosures (status, id);
+"""
+
+
+class DisclosureQueue:
+    def __init__(self, path=queue_db_path, max_attempts=queue_max_attempts, lease_minutes=queue_lease_minutes):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_minutes * 60
+        with self.connect() as db:
+            db.executescript(SCHEMA)
+
+    # A connection for one operation (sqlite3 connections can't be shared between threads), committed when the block ends
+    @contextmanager
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("PRAGMA journal_mode=WAL") # workers can read the backlog while another one writes
+            yield db
+        finally:
+            db.close()
+
+    # Adds a disclosure, returns False if the same file (by hash) is already in the queue
+        # again=True puts a file that is already in it back in the queue (with its attempts reset)
+    def enqueue(self, filePath, sCleanID=None, source="cli", again=False):
+        filePath = os.path.abspath(filePath)
+        sCleanID = sCleanID or get_clean_id(os.path.basename(filePath))
+        sHash = file_hash(filePath)
+        now = time.time()
+        with self.connect() as db:
+            added = db.execute(
+                "INSERT OR IGNORE INTO disclosures (clean_id, file_path, file_hash, source, enqueued, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (sCleanID, filePath, sHash, source, now, now)).rowcount
+            if not added and again:
+                added = db.execute(
+                    "UPDATE disclosures SET clean_id = ?, file_path = ?, source = ?, status = 'queued', stage = NULL, attempts = 0,"
+                    " last_error = NULL, worker = NULL, lease_until = NULL, enqueued = ?, updated = ? WHERE file_hash = ? AND status != 'running'",
+                    (sCleanID, filePath, source, now, now, sHash)).rowcount
+        return bool(added)
+
+    # Claims up to limit disclosures for a worker (queued ones, and running ones whose worker's lease ran out)
+        # returns the claimed rows, each one's attempts has already been counted
+    def claim(self, worker, limit=queue_batch_size):
+        now = time.time()
+        with self.connect() as db:
+            db.execute("BEGIN IMMEDIATE") # no other worker can claim between the select and the update
+            try:
+                rows = db.execute(
+                    "SELECT id FROM disclosures WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT ?",
+                    (now, limit)).fetchall()
+                ids = [row["id"] for row in rows]
+                db.executemany(
+                    "UPDATE disclosures SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, updated = ? WHERE id = ?",
+                    [(worker, now + self.lease_seconds, now, sId) for sId in ids])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            if not ids:
+                return []
+            return db.execute(f"SELECT * FROM disclosures WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id", ids).fetchall()
+
+    # Records the last pipeline step a disclosure finished (and keeps its lease alive)
+    def set_stage(self, sId, stage):
+        now = time.time()
+        with self.connect() as db:
+            db.execute("UPDATE disclosures SET stage = ?, lease_until = ?, updated = ? WHERE id = ?", (stage, now + self.lease_seconds, now, sId))
+
+    def finish(self, sId):
+        with self.connect() as db:
+            db.execute("UPDATE disclosures SET status = 'done', last_error = NULL, lease_until = NULL, updated = ? WHERE id = ?", (time.time(), sId))
+
+    # Records a failed attempt, the disclosure goes back in the queue until it has had max_attempts
+    def fail(self, sId, error):
+        with self.connect() as db:
+            db.execute(
+                "UPDATE disclosures SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " last_error = ?, lease_until = NULL, updated = ? WHERE id = ?",
+                (self.max_attempts, str(error), time.time(), sId))
+
+    # Puts a claimed disclosure back in the queue without counting the attempt (its worker was stopped, it didn't fail)
+    def release(self, sId):
+        with self.connect() as db:
+            db.execute(
+                "UPDATE disclosures SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, lease_until = NULL, updated = ?"
+                " WHERE id = ? AND status = 'running'",
+                (time.time(), sId))
+
+    # Puts every failed disclosure back in the queue, returns how many
+    def retry_failed(self):
+        with self.connect() as db:
+            return db.execute("UPDATE disclosures SET status = 'queued', attempts = 0, updated = ? WHERE status = 'failed'", (time.time(),)).rowcount
+
+    # {status: number of disclosures}
+    def counts(self):
+        with self.connect() as db:
+            return {row["status"]: row["count"] for row in db.execute("SELECT status, COUNT(*) AS count FROM disclosures GROUP BY status")}
+
+    # Every disclosure that isn't done yet, oldest first
+    def backlog(self, limit=200):
+        with self.connect() as db:
+            return db.execute("SELECT * FROM disclosures WHERE status != 'done' ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+
+# The key a queue entry's steps are recorded under in the queue journal
+    # (a new row for a new file, and a new key when the same file is queued again, so neither inherits earlier progress)
+def journal_key(row):
+    return f"queue-{row['id']}-{row['enqueued']:.3f}"
+
+
+# Journal for one claimed disclosure: records every step in the queue journal under the entry's journal_key
+    # and keeps the queue's stage column (and the lease) up to date
+class QueueJournal:
+    def __init__(self, disclosure_queue, journal, row):
+        self.queue = disclosure_queue
+        self.journal = journal
+        self.row_id = row["id"]
+        self.key = journal_key(row)
+
+    def record(self, sCleanID, step, error=None, **extra):
+        self.journal.record(self.key, step, error, clean_id=sCleanID, **extra)
+        if error is None:
+            self.queue.set_stage(self.row_id, step)
+
+    # Hands the disclosure the steps its entry already finished, returns True if it was already published
+    def resume(self, item, progress):
+        steps = progress.get(self.key, {})
+        item.completed = {step: entry for step, entry in steps.items() if entry["status"] == "done"}
+        item.journal = self
+        return "bs_publish" in item.completed
+
+
+# Adds every PDF in folder that isn't in the queue yet, returns how many were added
+    # seen (file path -> modification time) skips the files an earlier scan already looked at, so they aren't hashed again
+def scan_folder(disclosure_queue, folder, seen=None, source="watch"):
+    seen = {} if seen is None else seen
+    added = 0
+    for filePath in glob.glob(os.path.join(folder, "*.pdf")):
+        try:
+            mtime = os.path.getmtime(filePath)
+            if seen.get(filePath) == mtime:
+                continue
+            if disclosure_queue.enqueue(filePath, source=source):
+                added += 1
+            seen[filePath] = mtime
+        except OSError as e:
+            logging.warning(f"{os.path.basename(filePath)} - enqueue failed: {str(e)}") # still being copied in, tried again next scan
+    return added
+
+
+# Works through the queue: claims up to batch_size disclosures, runs them through the pipeline and records the outcome
+    # waits poll_seconds when the queue is empty (once=True returns instead), watch_folder is scanned for new PDFs before each claim
+    # stop_event ends it after the current batch, wait_log (a wait_functions.WaitLog) collects the waits of every batch
+    # and route_stats (a route_filter.RouteStats) the requests their browsers blocked
+def run_worker(userUsername="", userPassword="", disclosure_queue=None, batch_size=queue_batch_size, poll_seconds=queue_poll_seconds,
+               watch_folder=None, once=False, stop_event=None, wait_log=None, route_stats=None):
+    # imported here so adding to the queue and showing the backlog never load Playwright
+    from pipeline import Disclosure, run_pipeline, first_ignite_stage, pdf_stage, brightspot_stage
+    from journal import Journal
+
+    disclosure_queue = disclosure_queue or DisclosureQueue()
+    stop_event = stop_event or threading.Event()
+    worker = f"{socket.gethostname()}-{os.getpid()}-{multiprocessing.current_process().name}"
+    journal = Journal(queue_journal_path) # never starts a new batch, the entries are told apart by journal_key
+    seen = {}
+    finished = 0
+
+    while not stop_event.is_set():
+        if watch_folder:
+            scan_folder(disclosure_queue, watch_folder, seen)
+        rows = disclosure_queue.claim(worker, batch_size)
+        if not rows:
+            if once:
+                break
+            stop_event.wait(poll_seconds)
+            continue
+
+        # picks up the steps an earlier worker finished on these entries before it stopped
+        progress = journal.load()
+        disclosures = []
+        for row in rows:
+            disclosure = Disclosure(row["file_path"], row["clean_id"])
+            if QueueJournal(disclosure_queue, journal, row).resume(disclosure, progress):
+                disclosure_queue.finish(row["id"])
+            else:
+                disclosures.append(disclosure)
+
+        # a disclosure that fails once the worker is stopping was (most likely) cancelled, it goes back in the queue as it was
+        def on_result(item):
+            if item.errors and stop_event.is_set():
+                disclosure_queue.release(item.journal.row_id)
+            elif item.errors:
+                func_name, error = item.errors[0]
+                disclosure_queue.fail(item.journal.row_id, f"{func_name}: {error}")
+            else:
+                disclosure_queue.finish(item.journal.row_id)
+
+        stages = [
+            first_ignite_stage(firstignite_workers, tabs=firstignite_tabs),
+            pdf_stage(pdf_workers),
+            brightspot_stage(brightspot_workers, userUsername, userPassword),
+        ]
+        if disclosures:
+            successes, failures = run_pipeline(disclosures, stages, queue_size=pipeline_queue_size, on_result=on_result, cancel_event=stop_event, wait_log=wait_log, route_stats=route_stats)
+            finished += len(successes)
+            logging.info(f"Queue worker {worker}: {len(successes)} succeeded, {len(failures)} failed, queue is now {disclosure_queue.counts()}")
+    return finished
+
+
+def print_status(disclosure_queue):
+    counts = disclosure_queue.counts()
+    print(", ".join(f"{counts.get(status, 0)} {status}" for status in ("queued", "running", "failed", "done")))
+    for row in disclosure_queue.backlog():
+        sError = f" - {row['last_error']}" if row["last_error"] else ""
+        print(f"  {row['clean_id']:12} {row['status']:8} {row['stage'] or '':28} attempt {row['attempts']}{sError}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename='error_log.txt', filemode='a', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="The persistent disclosure queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add disclosure PDFs (or every PDF in a folder)")
+    add.add_argument("paths", nargs="+")
+    add.add_argument("--again", action="store_true", help="put files that were already in the queue back in it")
+    work = commands.add_parser("work", help="work through the queue")
+    work.add_argument("--watch", help="folder to keep adding new PDFs from")
+    work.add_argument("--once", action="store_true", help="stop when the queue is empty")
+    commands.add_parser("status", help="show the backlog")
+    commands.add_parser("retry", help="put every failed disclosure back in the queue")
+    args = parser.parse_args()
+
+    disclosure_queue = DisclosureQueue()
+    if args.command == "add":
+        added = 0
+        for path in args.paths:
+            filePaths = glob.glob(os.path.join(path, "*.pdf")) if os.path.isdir(path) else [path]
+            added += sum(disclosure_queue.enqueue(filePath, again=args.again) for filePath in filePaths)
+        print(f"Added {added} disclosure(s)")
+        print_status(disclosure_queue)
+    elif args.command == "work":
+        userUsername, userPassword = input("Enter your BYU Net ID: "), input("Enter your BYU password: ")
+        try:
+            run_worker(userUsername, userPassword, disclosure_queue, watch_folder=args.watch, once=args.once)
+        except KeyboardInterrupt:
+            pass
+        print_status(disclosure_queue)
+    elif args.command == "retry":
+        print(f"Put {disclosure_queue.retry_failed()} failed disclosure(s) back in the queue")
+    else:
+        print_status(disclosure_queue)
@@ -0,0 +1,97 @@
+# EDITOR FUNCTIONS
+    # Helpers for the Brightspot form widgets: the ProseMirror rich text editors and the searchable dropdowns
+    # select_text() finds a phrase in an editor and selects it in one call to the browser
+    # (instead of moving the cursor there one key press at a time, which breaks as soon as the text before it changes length)
+    # link_text() selects a phrase and clicks the editor's link button, so any anchored link is two lines
+    # select_option() picks a dropdown option by its label (instead of counting ArrowDown presses, which breaks when the list changes)
+
+# IMPORTS
+from wait_functions import wait_until, wait_for_visible
+
+# Selects the nth match of a phrase inside an editor and resolves to the selected text ("" if the phrase isn't there)
+    # the editor's text is spread over many text nodes (one per line/mark), so it walks all of them, finds the phrase
+    # in their joined text and puts a DOM selection over it; ProseMirror picks the selection up from the selectionchange event,
+    # which is why it waits a frame before returning
+SELECT_TEXT_JS = """
+async (editor, [phrase, nth]) => {
+    const walker = document.createTreeWalker(editor, NodeFilter.SHOW_TEXT);
+    const nodes = [];
+    let text = "";
+    while (walker.nextNode()) {
+        nodes.push([walker.currentNode, text.length]);
+        text += walker.currentNode.data;
+    }
+
+    let start = -1;
+    for (let i = 0; i <= nth; i++) {
+        start = text.indexOf(phrase, start + 1);
+        if (start < 0) return "";
+    }
+    const end = start + phrase.length;
+    // the text node a position of the joined text is in, and the offset inside that node
+    const locate = (position, isEnd) => {
+        const [node, offset] = nodes.find(([node, offset]) => isEnd ? position <= offset + node.data.length : position < offset + node.data.length);
+        return [node, position - offset];
+    };
+    const [startNode, startOffset] = locate(start, false);
+    const [endNode, endOffset] = locate(end, true);
+
+    editor.focus();
+    const range = document.createRange();
+    range.setStart(startNode, startOffset);
+    range.setEnd(endNode, endOffset);
+    const selection = window.getSelection();
+    selection.removeAllRanges();
+    selection.addRange(range);
+
+    await new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve)));
+    return window.getSelection().toString();
+}
+"""
+
+SELECTED_TEXT_JS = "() => window.getSelection().toString()"
+
+
+def _same_text(selected, phrase):
+    return " ".join(selected.split()) == " ".join(phrase.split())
+
+
+# Selects the nth time phrase shows up in the editor (a .ProseMirror locator)
+    # raises ValueError if the phrase isn't in the editor
+def select_text(editor, phrase, nth=0, timeout=5):
+    if not _same_text(editor.evaluate(SELECT_TEXT_JS, [phrase, nth]), phrase):
+        raise ValueError(f'"{phrase}" is not in the editor')
+    wait_until(editor.page, lambda: _same_text(editor.page.evaluate(SELECTED_TEXT_JS), phrase), timeout=timeout,
+               description=f'"{phrase}" to be selected')
+
+# Selects phrase in the editor and clicks the editor's link button (link_button), leaving the link editor open on it
+def link_text(editor, link_button, phrase, nth=0):
+    select_text(editor, phrase, nth)
+    link_button.click()
+
+
+# The options of an open Brightspot dropdown (the popup around its "Search" box)
+    # returns (search box, the visible option whose text is exactly label)
+def dropdown_option(page, label):
+    search_box = page.get_by_role("textbox", name="Search", exact=True).filter(visible=True).last
+    quoted = f"'{label}'" if "'" not in label else f'"{label}"'
+    popup = search_box.locator(f"xpath=ancestor::*[.//text()[normalize-space()={quoted}]][1]")
+    return search_box, popup.get_by_text(label, exact=True).filter(visible=True).first
+
+
+# Opens a dropdown (dropdown is the locator that opens it), picks the option called label and checks it was picked
+    # selected -> a locator that only shows up once the option took effect (by default: the dropdown shows the label)
+    # raises WaitTimeoutError if the option isn't in the list or the selection doesn't take
+def select_option(page, dropdown, label, selected=None, timeout=10):
+    dropdown.click()
+    search_box, option = dropdown_option(page, label)
+    wait_for_visible(search_box, timeout=timeout, description=f"the list with {label}")
+    search_box.fill(label) # filters the list down to the matching options
+    wait_for_visible(option, timeout=timeout, description=f"the {label} option")
+    option.click()
+    wait_for_visible(search_box, state="hidden", timeout=timeout, description=f"the list to close after picking {label}")
+    if selected is not None:
+        wait_for_visible(selected, timeout=timeout, description=f"{label} to be selected")
+    else:
+        wait_until(page, lambda: label in (dropdown.inner_text(timeout=1000) or ""), timeout=timeout,
+                   description=f"{label} to be selected")
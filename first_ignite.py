@@ -2,28 +2,327 @@
 # Goes to first ignite, loads the disclosure, then extracts the necessary information
 
 # IMPORTS
-from time import sleep # for sleeping, first ingnite needs to load
+import logging
+import os # for the file name used in the wait log
 import re # to find the proper text
+import time # to time each tab in the pool
+from urllib.parse import urlsplit, unquote, parse_qs # to find the run id in a response's URL
+from wait_functions import wait_until, record_wait, is_cancelled, WaitTimeoutError, WaitCancelledError # waits until first ignite has actually finished instead of a fixed sleep
+from formatting_functions import get_clean_id
+from page_pool import PagePool # reuses and recycles the tabs
+
+FIRSTIGNITE_URL = "https://app.firstignite.com/autopilot"
+EXHAUSTED = object() # what next() gives back once there are no more disclosures for the tab pool
+
+# How long every disclosure used to wait before the summary was checked (used to report the time saved)
+FIXED_SLEEP_SECONDS = 60
+
+# The sections of a summary, keyed by how FirstIgnite's response might spell them (lowercase, without spaces, _ or -)
+SECTION_NAMES = {
+    "title": "Title",
+    "category": "Category",
+    "executivestatement": "Executive Statement",
+    "description": "Description",
+    "keyadvantages": "Key Advantages",
+    "advantages": "Key Advantages",
+    "problemssolved": "Problems Solved",
+    "problemsaddressed": "Problems Solved",
+    "marketapplications": "Market Applications",
+}
+REQUIRED_SECTIONS = {"Title", "Executive Statement", "Description", "Key Advantages", "Problems Solved", "Market Applications"}
+# The keys the id of a run might be under in the response to the Launch request
+    # a bare "id" isn't one of them, any POST (a draft save, an upload) answers with an "id" of its own
+LAUNCH_ID_KEYS = ("runId", "run_id", "jobId", "job_id")
+# The keys an object of a later response might carry that run id under
+RUN_ID_KEYS = LAUNCH_ID_KEYS + ("id",)
+
+
+# Looks through a JSON response for the summary sections, returns {"Title": ..., "Executive Statement": ..., ...} or None
+    # FirstIgnite nests its result, so it checks every object in the response for one that has all the sections
+def find_sections(data):
+    if isinstance(data, dict):
+        sections = {}
+        for key, value in data.items():
+            name = SECTION_NAMES.get(re.sub(r"[\s_\-]", "", str(key)).lower())
+            if name and isinstance(value, (str, list)):
+                sections[name] = value
+        if REQUIRED_SECTIONS <= sections.keys():
+            return sections
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        sections = find_sections(child)
+        if sections:
+            return sections
+    return None
+
+
+# The id of the run a Launch response started (the first LAUNCH_ID_KEYS value in it, looking inside "data"/"run" too), or None
+def find_run_id(data):
+    while isinstance(data, dict):
+        for key in LAUNCH_ID_KEYS:
+            if isinstance(data.get(key), (str, int)) and not isinstance(data.get(key), bool):
+                return str(data[key])
+        data = data.get("data") or data.get("run")
+    return None
+
+
+# True when the run id is one of the URL's path segments or query values (exactly, so run 12 doesn't match /runs/123)
+def url_has_run_id(url, run_id):
+    parts = urlsplit(url)
+    if run_id in (unquote(segment) for segment in parts.path.split("/")):
+        return True
+    return any(run_id in values for values in parse_qs(parts.query).values())
+
+
+# The summary sections of one run in a response: the whole response when its URL has the run id in it,
+    # otherwise only an object that carries the run id (so a list of earlier runs can't be taken for this one)
+def find_run_sections(data, run_id, url=""):
+    if url_has_run_id(url, run_id):
+        return find_sections(data)
+    if isinstance(data, dict):
+        if any(str(data.get(key)) == run_id for key in RUN_ID_KEYS if key in data):
+            return find_sections(data)
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        sections = find_run_sections(child, run_id)
+        if sections:
+            return sections
+    return None
+
+
+# Listens to the JSON responses a FirstIgnite page gets and picks out the summary sections as soon as they arrive
+    # (so the summary doesn't have to be read back out of the Summary tab and split apart again)
+    # it only takes the summary of the run this disclosure launched: start() is called just before the Launch click,
+    # the first POST response after it that has a run id is the launch, and only responses for that run id count
+    # (the page also loads earlier runs, drafts and history, which have all the sections too)
+    # without a run id it captures nothing and the summary is read from the Summary tab
+    # the responses are only collected in the event handler and read in sections(), on the thread that drives the page
+class SummaryCapture:
+    def __init__(self, page):
+        self.page = page
+        self.responses = []
+        self.result = None
+        self.run_id = None
+        self.listening = False
+
+    def on_response(self, response):
+        if "firstignite.com" in response.url and "json" in (response.headers.get("content-type") or ""):
+            self.responses.append(response)
+
+    # Starts listening (or starts over, forgetting everything captured so far)
+    def start(self):
+        self.responses, self.result, self.run_id = [], None, None
+        if not self.listening:
+            self.page.on("response", self.on_response)
+            self.listening = True
+        return self
+
+    def stop(self):
+        if self.listening:
+            self.page.remove_listener("response", self.on_response)
+            self.listening = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # The captured sections, or None if no response for this run had them yet
+    def sections(self):
+        while self.result is None and self.responses:
+            response = self.responses.pop(0)
+            try:
+                if self.run_id is None:
+                    if response.request.method != "POST":
+                        continue
+                    self.run_id = find_run_id(response.json())
+                    if self.run_id is None:
+                        continue
+                self.result = find_run_sections(response.json(), self.run_id, response.url)
+            except Exception:
+                pass # not JSON after all, or the page moved on before the body was read
+        return self.result
 
 
 # Function that uploads a file into firstignite, runs it, then extracts the text from the summary tab
     # it first locates the toggle that allows pdf files to be inserted, launches it, navigates to the summary tab, then extracts all the text
-    # and returns just the summary text (which will then be formatted and cleaned) 
+    # and returns just the summary text (which will then be formatted and cleaned)
+    # returns the sections from FirstIgnite's response when it can capture them (see SummaryCapture), otherwise the text of the summary tab
+    # (format_summary takes either)
+def launch_first_ignite(page, filePath, timeout=500):
+    with SummaryCapture(page) as capture:
+        submit_first_ignite(page, filePath, capture)
 
-def launch_first_ignite(page, filePath):
+        # waits until the summary arrives or the summary tab is rendered (raises WaitTimeoutError after timeout seconds)
+        sFileName = os.path.basename(filePath)
+        summary_label = page.locator("#Summary-label")
+        wait_until(page, lambda: capture.sections() is not None or summary_label.is_visible(), timeout=timeout,
+                   description="the FirstIgnite summary", label=f"first_ignite:{sFileName}")
+
+        if capture.sections() is not None:
+            return capture.sections()
+    return read_first_ignite_summary(page, filePath)
+
+
+# Turns on the file toggle, uploads the disclosure and launches it (doesn't wait for the result)
+    # capture -> a SummaryCapture to (re)start right before the Launch click, so it only sees this run's responses
+def submit_first_ignite(page, filePath, capture=None):
     page.locator("div").filter(has_text=re.compile(r"^TextFile$")).locator("label span").click() # turns on the toggle that allows files to be uploaded
-    sleep(1)
 
     # Fix: Use proper selector for file upload area
     # The file upload area is likely an input element with type="file"
     file_input = page.locator('input[type="file"]')
-    file_input.set_input_files(filePath) # uploads the file being used in the for loop
-    
+    file_input.set_input_files(filePath) # uploads the file being used in the for loop (waits for the input to appear)
+
+    if capture is not None:
+        capture.start()
     page.get_by_text("Launch 🚀").click() # launches
 
-    sleep(60) # waits for it to load
-    page.locator("#Summary-label").click(timeout=500*1000) # locates where all the text is in the summary tab
+
+# Opens the summary tab of a finished run and returns its text
+def read_first_ignite_summary(page, filePath):
+    page.locator("#Summary-label").click() # locates where all the text is in the summary tab
+
+    # waits until the summary text is in and has stopped changing
+    editor = page.locator(".editor__content")
+    wait_until(page, lambda: (editor.text_content(timeout=1000) or "").strip(), timeout=60,
+               description="the FirstIgnite summary text", quiet=1, label=f"first_ignite_text:{os.path.basename(filePath)}")
 
     # locates where the text is then gets it
-    summaryText = page.locator(".editor__content").text_content()
-    return summaryText
\ No newline at end of file
+    summaryText = editor.text_content()
+    return summaryText
+
+
+# FIRST IGNITE TAB POOL
+    # FirstIgnite spends most of its time generating on its server, so instead of one tab waiting per disclosure
+    # this keeps up to `tabs` autopilot tabs running in the same (logged in) browser context
+    # yields (filePath, summaryText, error) for each disclosure in the order they finish
+    # filePaths can be any iterable, the next one is only taken when a tab frees up
+    # it can yield None while tabs are busy to say nothing is waiting yet (the pipeline does, instead of blocking on its inbox),
+    # the tabs are polled and it is asked again on the next round
+    # the tabs come from a PagePool (pass one in to share it, otherwise one with `tabs` pages is made and closed at the end)
+    # so a tab is reset between disclosures and replaced after a failure or once it has been used too often
+    # once the run is cancelled it takes no more disclosures and yields the ones still generating as failed
+def iter_first_ignite_pool(context, filePaths, tabs=3, timeout=500, pool=None):
+    filePaths = iter(filePaths)
+    own_pool = pool is None
+    pool = pool or PagePool(context, max_pages=tabs)
+    busy = {} # page -> (filePath, time it was launched, its SummaryCapture)
+    exhausted = False
+    interval = 0.25
+
+    try:
+        while True:
+            # a cancelled run gives up on the tabs still generating and submits nothing more
+            if is_cancelled():
+                error = WaitCancelledError("Cancelled while waiting for the FirstIgnite summary")
+                for page, (filePath, started, capture) in list(busy.items()):
+                    capture.stop()
+                    del busy[page]
+                    pool.release(page, healthy=False)
+                    yield filePath, None, error
+                break
+
+            # gives every free tab the next disclosure
+            while not exhausted and len(busy) < tabs and not is_cancelled():
+                filePath = next(filePaths, EXHAUSTED)
+                if filePath is EXHAUSTED:
+                    exhausted = True
+                    break
+                if filePath is None:
+                    break
+                page = pool.acquire()
+                error = None
+                capture = SummaryCapture(page)
+                try:
+                    page.goto(FIRSTIGNITE_URL)
+                    submit_first_ignite(page, filePath, capture)
+                    busy[page] = (filePath, time.monotonic(), capture)
+                except Exception as e:
+                    error = e
+                    capture.stop()
+                    pool.release(page, healthy=False)
+                if error is not None:
+                    yield filePath, None, error
+
+            if not busy:
+                if exhausted:
+                    break
+                continue
+
+            # collects every tab whose summary is ready (or that has run out of time)
+            finished = []
+            for page, (filePath, started, capture) in list(busy.items()):
+                waited = time.monotonic() - started
+                summaryText, error = None, None
+                try:
+                    if capture.sections() is not None or page.locator("#Summary-label").is_visible():
+                        record_wait(f"first_ignite:{os.path.basename(filePath)}", waited)
+                        summaryText = capture.sections() or read_first_ignite_summary(page, filePath)
+                    elif waited > timeout:
+                        raise WaitTimeoutError(f"Timed out after {timeout:.0f}s waiting for the FirstIgnite summary")
+                    else:
+                        continue
+                except Exception as e:
+                    error = e
+                capture.stop()
+                del busy[page]
+                pool.release(page, healthy=error is None)
+                finished.append((filePath, summaryText, error))
+
+            for result in finished:
+                yield result
+
+            # polls again quickly right after a tab finished, backing off while every tab is still generating
+            interval = 0.25 if finished else min(interval * 2, 2.0)
+            if busy:
+                next(iter(busy)).wait_for_timeout(interval * 1000)
+    finally:
+        for page, (filePath, started, capture) in busy.items():
+            capture.stop()
+            pool.release(page, healthy=False)
+        if own_pool:
+            pool.close()
+
+
+# Runs a list of disclosures through the tab pool and returns (summaries, errors)
+    # both are dictionaries keyed by the ID id_func pulls out of the file name (get_clean_id, or extract_id in app.py)
+    # disclosures a cancelled run never submitted are errors too
+def run_first_ignite_pool(context, filePaths, tabs=3, timeout=500, id_func=get_clean_id):
+    filePaths = list(filePaths)
+    summaries, errors = {}, {}
+    for filePath, summaryText, error in iter_first_ignite_pool(context, filePaths, tabs, timeout):
+        sCleanID = id_func(os.path.basename(filePath))
+        if error is not None:
+            errors[sCleanID] = str(error)
+            logging.warning(f"{sCleanID} - launch_first_ignite failed: {str(error)}")
+        else:
+            summaries[sCleanID] = summaryText
+    for filePath in filePaths:
+        sCleanID = id_func(os.path.basename(filePath))
+        if sCleanID not in summaries and sCleanID not in errors:
+            errors[sCleanID] = "Cancelled before it was submitted"
+    return summaries, errors
+
+
+# Reports how long a run actually waited on FirstIgnite compared to the old fixed 60 second sleep
+    # wait_log is the run's WaitLog, a disclosure's wait is its "first_ignite:" wait for the run to finish
+    # plus its "first_ignite_text:" wait for the summary text (when it was read from the summary tab)
+    # returns (number of disclosures, seconds waited, seconds saved)
+def first_ignite_wait_report(wait_log):
+    waits = {}
+    for prefix in ("first_ignite:", "first_ignite_text:"):
+        for label, seconds in wait_log.labelled(prefix):
+            sFileName = label[len(prefix):]
+            waits[sFileName] = waits.get(sFileName, 0) + seconds
+    saved = sum(max(FIXED_SLEEP_SECONDS - seconds, 0) for seconds in waits.values())
+    return len(waits), sum(waits.values()), saved
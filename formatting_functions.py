@@ -10,35 +10,70 @@ def get_clean_id(sFileName):
     sCleanID = re.sub(r'[^0-9-]', '', sFileName)     # Use regex to extract only numbers and hyphens
     return sCleanID # returns just the cleaned file name
 
-# Formats the summary information and returns all the variables
-def format_summary(extractedSummaryText):
-    formattedOut = re.findall("Title:(.+)Category:.+Executive Statement:(.+)Description:(.+)Key Advantages:(.+)Problems Solved:(.+)Market Applications:(.+)",extractedSummaryText)[0]
-    # assigns the tuple value to these variables
-    sTitle = formattedOut[0]
-    sExecutiveStatement = formattedOut[1]
-    sDescription = formattedOut[2]
-    sAdvantages = formattedOut[3]
-    sProblemsSolved = formattedOut[4]
-    sMarketApplications = formattedOut[5]
+SENTENCE_JOIN = re.compile(r"([a-z])([A-Z])")
 
-    # splits the tuple by each period to add to each list to be made into buller points in create_pdf()
-    lstAdvantages = [
-        item.strip() 
-        for item in re.sub(r"([a-z])([A-Z])", r"\1. \2", sAdvantages).split(".") 
-        if item.strip()
-    ]
+# The headings of the summary tab, in the order FirstIgnite writes them
+SUMMARY_HEADINGS = ("Title:", "Category:", "Executive Statement:", "Description:", "Key Advantages:", "Problems Solved:", "Market Applications:")
 
-    lstProblemsSolved = [
-        item.strip() 
-        for item in re.sub(r"([a-z])([A-Z])", r"\1. \2", sProblemsSolved).split(".") 
+# Splits a section into its sentences (for the bullet points in create_pdf())
+    # FirstIgnite sometimes leaves out the space and period between sentences, so a lowercase letter followed by a capital starts a new one
+def split_sentences(sSection):
+    return [
+        item.strip()
+        for item in SENTENCE_JOIN.sub(r"\1. \2", sSection).split(".")
         if item.strip()
     ]
 
-    lstMarketApplications = [
-        item.strip() 
-        for item in re.sub(r"([a-z])([A-Z])", r"\1. \2", sMarketApplications).split(".") 
-        if item.strip()
-    ]
+# A text section from the FirstIgnite response, either one string or a list of lines/paragraphs (joined with sep)
+def section_text(section, sep=" "):
+    if isinstance(section, list):
+        return sep.join(str(item).strip() for item in section if str(item).strip())
+    return (section or "").strip()
+
+# A list section from the FirstIgnite response, either already a list or one string of sentences
+def section_list(section):
+    if isinstance(section, list):
+        return [str(item).strip() for item in section if str(item).strip()]
+    return split_sentences(section or "")
+
+# Cuts the summary text into its sections, returns the text after each of SUMMARY_HEADINGS in order
+    # finds the headings from the end backwards: the last "Market Applications:", then the last "Problems Solved:" before it
+    # and so on, which is what the old greedy regex matched, but in one scan of the text instead of backtracking over it
+    # when a heading is missing or out of order (every section needs at least one character)
+def summary_sections(sSummaryText):
+    starts = []
+    end = len(sSummaryText)
+    for sHeading in reversed(SUMMARY_HEADINGS[1:]):
+        start = sSummaryText.rfind(sHeading, 0, max(end - 1, 0))
+        if start == -1:
+            raise ValueError(f"The summary has no '{sHeading}' section")
+        starts.append(start)
+        end = start
+    start = sSummaryText.find(SUMMARY_HEADINGS[0], 0, max(end - 1, 0))
+    if start == -1:
+        raise ValueError(f"The summary has no '{SUMMARY_HEADINGS[0]}' section")
+    starts.append(start)
+    starts.reverse()
+
+    ends = starts[1:] + [len(sSummaryText)]
+    return [sSummaryText[start + len(sHeading):end] for sHeading, start, end in zip(SUMMARY_HEADINGS, starts, ends)]
+
+# Formats the summary information and returns all the variables
+    # extractedSummaryText is either the text of the summary tab or the sections captured from the FirstIgnite response
+    # ({"Title": ..., "Executive Statement": ..., ...}, see first_ignite.find_sections), which are already split
+def format_summary(extractedSummaryText):
+    if isinstance(extractedSummaryText, dict):
+        sections = extractedSummaryText
+        return (section_text(sections["Title"]), section_text(sections["Executive Statement"]), section_text(sections["Description"], "\n"),
+                section_list(sections.get("Key Advantages")), section_list(sections.get("Problems Solved")),
+                section_list(sections.get("Market Applications")))
+
+    sTitle, sCategory, sExecutiveStatement, sDescription, sAdvantages, sProblemsSolved, sMarketApplications = summary_sections(extractedSummaryText)
+
+    # splits the tuple by each period to add to each list to be made into buller points in create_pdf()
+    lstAdvantages = split_sentences(sAdvantages)
+    lstProblemsSolved = split_sentences(sProblemsSolved)
+    lstMarketApplications = split_sentences(sMarketApplications)
 
     return sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications
 
@@ -0,0 +1,137 @@
+# JOBS
+    # Runs automation batches in background threads so the Streamlit script (and every rerun of it) never waits on a browser
+    # each job has an ID and keeps a small status (counts, the last few finished files) the UI polls with job.snapshot()
+    # job.cancel() sets the job's cancel_event, the pipeline fails the files still waiting and stops the waits of the ones
+    # in progress, so a batch stops within seconds instead of after the current file
+    # job_runner is shared by every session of the app: starting a job while one with the same key is still running
+    # returns the running one instead of a second run, so several people can watch the same batch
+
+# IMPORTS
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from config import job_event_count, job_history
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:8]
+        self.key = key
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.status = "queued" # queued, running, cancelling, finished, cancelled or failed
+        self.total = 0
+        self.successes = [] # IDs that finished without errors
+        self.failures = [] # (file name, error message)
+        self.events = deque(maxlen=job_event_count) # ("success" or "error", message) for the latest files
+        self.notes = [] # lines reported when the job ends (wait times, blocked requests)
+        self.last = "" # the last thing that happened
+        self.result = None # whatever the job function returned
+        self.error = None
+        self.started = time.time()
+        self.ended = None
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATUSES
+
+    def set_total(self, total):
+        with self.lock:
+            self.total = total
+
+    def add_success(self, sCleanID, message):
+        with self.lock:
+            self.successes.append(sCleanID)
+            self.events.append(("success", message))
+            self.last = message
+
+    def add_failure(self, name, error, message):
+        with self.lock:
+            self.failures.append((name, error))
+            self.events.append(("error", message))
+            self.last = message
+
+    def note(self, message):
+        with self.lock:
+            self.notes.append(message)
+
+    def cancel(self):
+        with self.lock:
+            if self.active:
+                self.cancel_event.set()
+                self.status = "cancelling"
+
+    # Everything the UI needs to draw the job, copied so it can be read without the lock
+    def snapshot(self):
+        with self.lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "active": self.active,
+                "total": self.total,
+                "done": len(self.successes) + len(self.failures),
+                "succeeded": len(self.successes),
+                "failed": len(self.failures),
+                "events": list(self.events),
+                "last": self.last,
+                "error": self.error,
+                "elapsed": (self.ended or time.time()) - self.started,
+            }
+
+
+class JobRunner:
+    def __init__(self, history=job_history):
+        self.lock = threading.Lock()
+        self.jobs = {} # id -> Job, oldest first
+        self.history = history
+
+    # Starts func(job, *args, **kwargs) in a new thread, returns (job, started)
+        # started is False when a job with the same key was already running (that job is returned and func isn't called)
+    def start(self, key, func, *args, **kwargs):
+        with self.lock:
+            for job in self.jobs.values():
+                if job.key == key and job.active:
+                    return job, False
+            job = Job(key)
+            self.jobs[job.id] = job
+            self.prune()
+        threading.Thread(target=self.run, args=(job, func, args, kwargs), name=f"job-{job.id}", daemon=True).start()
+        return job, True
+
+    def run(self, job, func, args, kwargs):
+        with job.lock:
+            if job.status == "queued":
+                job.status = "running"
+        try:
+            result = func(job, *args, **kwargs)
+            status, error = ("cancelled" if job.cancel_event.is_set() else "finished"), None
+        except Exception as e:
+            logging.warning(f"Job {job.id} failed: {str(e)}")
+            result, status, error = None, "failed", str(e)
+        with job.lock:
+            job.result, job.status, job.error, job.ended = result, status, error, time.time()
+
+    # Forgets the oldest finished jobs past the history limit (call with the lock held)
+    def prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # The newest job with this key (running or not), or None
+    def latest(self, key):
+        with self.lock:
+            for job in reversed(list(self.jobs.values())):
+                if job.key == key:
+                    return job
+        return None
+
+job_runner = JobRunner()
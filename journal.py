@@ -0,0 +1,85 @@
+# JOURNAL
+    # Append-only record of how far every disclosure of a batch got, so an interrupted batch can be resumed
+    # every finished (or failed) step is one JSON line: launch_first_ignite, format_summary, create_pdf and each bs_* step
+    # a new batch appends a "batch_started" line, resuming reads every line after the last one
+    # resuming works per disclosure, not per step: it skips the disclosures that were already published
+    # and only the steps whose results still exist outside the browser
+    # (the FirstIgnite summary comes back from the summary cache, the sell sheet from its export folder if it was written there,
+    # app.py never writes them so it always makes them again)
+    # a Brightspot draft that wasn't published is lost with its page, so those disclosures start Brightspot again from the template
+
+# IMPORTS
+import json
+import logging
+import os
+import threading
+import time
+
+from config import journal_path
+
+BATCH_STARTED = "batch_started"
+
+
+class Journal:
+    def __init__(self, path=journal_path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    # Appends one line (flushed straight away, so a crash loses at most the line being written)
+    def write(self, entry):
+        line = json.dumps({"time": time.time(), **entry}, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self.lock:
+            with open(self.path, "a+b") as f:
+                # a run that died mid line left no newline, starts a new line so this entry isn't lost with it
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # Starts a new batch (resume=False) or keeps adding to the last one (resume=True)
+    def start(self, resume=False):
+        if not resume or not os.path.exists(self.path):
+            self.write({"step": BATCH_STARTED})
+
+    # Records one step of a disclosure, error is None when the step succeeded
+    def record(self, sCleanID, step, error=None, **extra):
+        entry = {"id": sCleanID, "step": step, "status": "failed" if error is not None else "done", **extra}
+        if error is not None:
+            entry["error"] = str(error)
+        try:
+            self.write(entry)
+        except OSError as e:
+            logging.warning(f"{sCleanID} - journal record failed: {str(e)}")
+
+    # Reads the last batch, returns {sCleanID: {step: the last entry for that step}}
+        # a half written last line (the run died while writing it) is ignored
+    def load(self):
+        progress = {}
+        if not os.path.exists(self.path):
+            return progress
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("step") == BATCH_STARTED:
+                    progress = {}
+                elif "id" in entry:
+                    progress.setdefault(entry["id"], {})[entry["step"]] = entry
+        return progress
+
+    # Hands each disclosure the steps it already finished in the last batch and the journal to record the rest
+        # returns (disclosures that still need work, disclosures that were already published)
+    def resume(self, items):
+        progress = self.load()
+        pending, published = [], []
+        for item in items:
+            steps = progress.get(item.sCleanID, {})
+            item.completed = {step: entry for step, entry in steps.items() if entry["status"] == "done"}
+            item.journal = self
+            (published if "bs_publish" in item.completed else pending).append(item)
+        return pending, published
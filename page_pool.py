@@ -0,0 +1,120 @@
+# PAGE POOL
+    # Hands out the pages (tabs) of one browser context instead of opening a new page for every disclosure
+    # and keeps the browser's memory flat over a long batch:
+    #   - at most max_pages pages are open at once (lease() waits for a free one)
+    #   - a page that comes back is reset to about:blank so the next disclosure starts clean
+    #   - a page is closed and replaced after max_uses disclosures or once its JavaScript heap passes max_heap_mb
+    #   - a page that was closed, crashed or failed to reset is dropped and replaced
+    # use it as:  with pool.lease() as page: ...   (or acquire()/release() when a page is held across a loop, like the FirstIgnite tab pool)
+
+# IMPORTS
+import logging
+import threading
+from contextlib import contextmanager
+
+from config import page_pool_size, page_max_uses, page_max_heap_mb
+
+HEAP_USED_JS = "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+
+
+class PagePool:
+    def __init__(self, context, max_pages=page_pool_size, max_uses=page_max_uses, max_heap_mb=page_max_heap_mb):
+        self.context = context
+        self.max_pages = max(1, max_pages)
+        self.max_uses = max_uses
+        self.max_heap_mb = max_heap_mb
+        self.free = [] # open pages nobody is using
+        self.uses = {} # every open page of the pool -> how many disclosures it has been used for
+        self.condition = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    # Adds a page that is already open (the first page of a new browser, for example)
+    def add(self, page):
+        with self.condition:
+            self.uses.setdefault(page, 0)
+            self.free.append(page)
+            self.condition.notify()
+
+    # Takes a free page, opening a new one while there are fewer than max_pages (waits for one to come back otherwise)
+    def acquire(self, timeout=None):
+        with self.condition:
+            while True:
+                while self.free:
+                    page = self.free.pop()
+                    if not page.is_closed():
+                        return page
+                    self.uses.pop(page, None)
+                if len(self.uses) < self.max_pages:
+                    page = self.context.new_page()
+                    self.uses[page] = 0
+                    self.created += 1
+                    return page
+                if not self.condition.wait(timeout):
+                    raise TimeoutError(f"No page came back to the pool within {timeout}s")
+
+    # Gives a page back, healthy=False (the disclosure failed partway) replaces it instead of reusing it
+    def release(self, page, healthy=True):
+        reason = self.retire_reason(page, healthy)
+        if reason is None:
+            try:
+                page.goto("about:blank", timeout=10000)
+            except Exception as e:
+                reason = f"reset failed: {str(e)}"
+        if reason is not None:
+            self.recycled += 1
+            logging.info(f"Recycling a page ({reason})")
+            if not page.is_closed():
+                try:
+                    page.close()
+                except Exception:
+                    pass
+
+        with self.condition:
+            if reason is None:
+                self.uses[page] += 1
+                self.free.append(page)
+            else:
+                self.uses.pop(page, None)
+            self.condition.notify()
+
+    # Why a page shouldn't be used again, or None
+    def retire_reason(self, page, healthy):
+        if page.is_closed():
+            return "closed"
+        if not healthy:
+            return "the last disclosure failed on it"
+        if self.max_uses and self.uses.get(page, 0) + 1 >= self.max_uses:
+            return f"used {self.max_uses} times"
+        if self.max_heap_mb:
+            try:
+                heap_mb = page.evaluate(HEAP_USED_JS) / 1e6
+            except Exception as e:
+                return f"unresponsive: {str(e)}"
+            if heap_mb > self.max_heap_mb:
+                return f"JS heap at {heap_mb:.0f} MB"
+        return None
+
+    # Leases a page for one disclosure, it is released (and reset or recycled) when the with block ends
+    @contextmanager
+    def lease(self, timeout=None):
+        page = self.acquire(timeout)
+        healthy = False
+        try:
+            yield page
+            healthy = True
+        finally:
+            self.release(page, healthy)
+
+    # Closes every page of the pool
+    def close(self):
+        with self.condition:
+            pages = list(self.uses)
+            self.uses.clear()
+            self.free.clear()
+        for page in pages:
+            if not page.is_closed():
+                try:
+                    page.close()
+                except Exception:
+                    pass
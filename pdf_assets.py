@@ -0,0 +1,86 @@
+# PDF ASSETS
+    # Loads the fonts and images every sell sheet uses once per process and shares them between every FPDF create_pdf makes
+    # without it each sell sheet re-read both NotoSans fonts (their .pkl metrics, or the whole TTF when the .pkl
+    # can't be read or written, like on a read-only deployment) and decoded the banner and footer PNGs again
+    #   add_font(pdf, family, style, fname) -> pdf.add_font(family, style, fname, uni=True) from the loaded metrics
+    #   image(pdf, name, ...)                -> pdf.image(name, ...) from the decoded image
+    # fpdf already embeds only the glyphs a sell sheet uses (a subset of a few KB per font, made in output()),
+    # so most of a sheet is the banner image, its pixels are recompressed at the highest zlib level once when it is decoded
+    # every FPDF gets its own copy of the small per-document parts (the font's subset, the object numbers written in output())
+    # while the big parts (the character widths, the compressed image data) are shared and never changed
+
+# IMPORTS
+import threading
+import zlib
+
+from fpdf import FPDF
+
+
+class PDFAssets:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fonts = {} # (family, style, fname) -> (fontkey, font, {name: font file})
+        self.images = {} # image path -> (decoded image, PDF version it needs)
+        self.loads = 0
+        self.hits = 0
+
+    # The loaded font as (fontkey, font, font files), loading it the first time
+    def font(self, family, style, fname):
+        key = (family, style, fname)
+        with self.lock:
+            if key in self.fonts:
+                self.hits += 1
+            else:
+                scratch = FPDF()
+                scratch.add_font(family, style, fname, uni=True)
+                fontkey, font = next(iter(scratch.fonts.items()))
+                self.fonts[key] = (fontkey, font, scratch.font_files)
+                self.loads += 1
+            return self.fonts[key]
+
+    # The decoded image and the PDF version it needs (1.4 for a PNG with an alpha channel), decoding it the first time
+        # (fpdf works out the image type the same way pdf.image() does)
+    def image(self, name):
+        with self.lock:
+            if name in self.images:
+                self.hits += 1
+            else:
+                scratch = FPDF()
+                scratch.add_page()
+                scratch.image(name, x=0, y=0)
+                info = dict(scratch.images[name])
+                info.pop("i", None)
+                if info.get("f") == "FlateDecode": # lossless, the PNG's own compression is usually the fast default
+                    for key in ("data", "smask"):
+                        if key in info:
+                            info[key] = zlib.compress(zlib.decompress(info[key]), 9)
+                self.images[name] = (info, scratch.pdf_version)
+                self.loads += 1
+            return self.images[name]
+
+    # Forgets everything (the next sell sheet loads it all again)
+    def clear(self):
+        with self.lock:
+            self.fonts.clear()
+            self.images.clear()
+
+pdf_assets = PDFAssets()
+
+
+# Adds a unicode TTF font to pdf from the registry
+def add_font(pdf, family, style, fname):
+    fontkey, font, font_files = pdf_assets.font(family, style, fname)
+    if fontkey in pdf.fonts:
+        return
+    pdf.fonts[fontkey] = dict(font, i=len(pdf.fonts) + 1, subset=list(font["subset"]))
+    for name, info in font_files.items():
+        pdf.font_files[name] = dict(info)
+
+
+# Puts an image on the page from the registry (same arguments as pdf.image)
+def image(pdf, name, x=None, y=None, w=0, h=0, type='', link=''):
+    if name not in pdf.images:
+        info, pdf_version = pdf_assets.image(name)
+        pdf.images[name] = dict(info, i=len(pdf.images) + 1)
+        pdf.pdf_version = max(pdf.pdf_version, pdf_version)
+    pdf.image(name, x=x, y=y, w=w, h=h, type=type, link=link)
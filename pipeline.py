@@ -0,0 +1,549 @@
+# PIPELINE
+    # Runs the disclosures through three stages instead of one file at a time:
+    # FIRST IGNITE (extract the summary) -> PDF (format the summary, create the sell sheet) -> BRIGHTSPOT (enter and publish the page)
+    # each stage has its own worker threads and a bounded queue in front of it,
+    # so disclosure N+1 can be in FirstIgnite while disclosure N is being entered into Brightspot
+    # every FirstIgnite/Brightspot worker owns its own Playwright browser (the sync API can't be shared between threads)
+
+# IMPORTS
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+from playwright.sync_api import sync_playwright
+from playwright_launcher import run, use_headless
+from first_ignite import launch_first_ignite, iter_first_ignite_pool, FIRSTIGNITE_URL
+from formatting_functions import format_summary
+from create_pdf import create_pdf, save_sell_sheet, sell_sheet_path
+from summary_cache import load_summary, save_summary, prune_cache
+from brightspot_functions import *
+from page_pool import PagePool
+from wait_functions import cancel_waits_on, log_waits_to
+from route_filter import count_routes_in
+from sessions import ensure_firstignite_session, BrightspotSession, LoginRequiredError
+from brightspot_api import BrightspotAPI, publish_technology
+from config import login_wait_seconds, use_summary_cache, summary_cache_refresh, brightspot_backend, write_sell_sheets
+
+# Put on a queue after the last disclosure so the workers know to stop
+STOP = object()
+
+
+# The queue in front of a stage, holds at most size disclosures
+    # the STOP markers don't take up a slot, so stopping a stage never blocks
+class Inbox:
+    def __init__(self, size):
+        self.queue = queue.Queue()
+        self.slots = threading.Semaphore(max(1, size))
+
+    def put(self, item):
+        self.slots.acquire()
+        self.queue.put(item)
+
+    def stop(self, count):
+        for _ in range(count):
+            self.queue.put(STOP)
+
+    def get(self):
+        item = self.queue.get()
+        if item is not STOP:
+            self.slots.release()
+        return item
+
+    # Same as get() but returns None straight away when nothing is waiting
+    def get_nowait(self):
+        try:
+            item = self.queue.get_nowait()
+        except queue.Empty:
+            return None
+        if item is not STOP:
+            self.slots.release()
+        return item
+
+
+# One disclosure moving through the pipeline
+class Disclosure:
+    def __init__(self, filePath, sCleanID):
+        self.filePath = filePath
+        self.sCleanID = sCleanID
+        self.summaryText = None
+        self.fields = None # (sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications)
+        self.exportFolder = None # where the sell sheet was written (None -> it is only in pdfBytes)
+        self.pdfBytes = None # the sell sheet itself, uploaded from memory instead of being read back from exportFolder
+        self.errors = [] # (func_name, error message) for every step that failed
+        self.completed = {} # step -> its journal entry, for the steps an earlier run already finished (see journal.py)
+        self.journal = None # the journal every step is recorded in (None -> not recorded)
+
+
+# Raised by a stage when one of its steps fails, keeps the name of the function that failed
+class StepError(Exception):
+    def __init__(self, func_name, error):
+        super().__init__(str(error))
+        self.func_name = func_name
+
+
+# Calls one step of a stage and tags any error with the step's name
+def run_step(func_name, func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        raise StepError(func_name, e) from e
+
+
+# Records a finished (or failed) step of a disclosure in its journal, if it has one
+def checkpoint(item, func_name, error=None, **extra):
+    journal = getattr(item, "journal", None)
+    if journal is not None:
+        journal.record(item.sCleanID, func_name, error, **extra)
+
+# run_step for a disclosure, records the step in the journal when it succeeds
+def run_item_step(item, func_name, func, *args):
+    result = run_step(func_name, func, *args)
+    checkpoint(item, func_name)
+    return result
+
+
+# A stage of the pipeline
+    # func(resource, item) does the work and returns the item for the next stage
+    # setup() runs once in each worker thread and returns that worker's resource (a browser, for example)
+    # teardown(resource) runs when the worker is done
+    # batch=True -> func(resource, items) instead takes an iterator of items and yields them back as they finish,
+    #               so one worker can have several disclosures in progress at once (the FirstIgnite tab pool)
+    #               while it has some in progress the iterator yields None instead of blocking when no new one is waiting
+    # skip(item) -> True sends the item straight past this stage to the next one (a summary that is already cached, for example)
+class Stage:
+    def __init__(self, name, func, workers=1, setup=None, teardown=None, batch=False, skip=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.setup = setup
+        self.teardown = teardown
+        self.batch = batch
+        self.skip = skip
+
+
+# Worker loop for one thread of a stage
+    # forward(item) hands a processed item on (see run_pipeline), outbox is only used to stop the next stage
+def _worker(stage, inbox, outbox, forward, next_workers, results, state, cancel_event, wait_log, route_stats):
+    cancel_waits_on(cancel_event) # every wait in this thread stops within seconds once the run is cancelled
+    log_waits_to(wait_log) # and is recorded in this run's wait log
+    count_routes_in(route_stats) # the browsers this thread opens count their blocked requests for this run
+    resource, setup_error = None, None
+    if stage.setup:
+        try:
+            resource = stage.setup()
+        except Exception as e:
+            setup_error = e
+            logging.warning(f"{stage.name} worker failed to start: {str(e)}")
+            with state["lock"]:
+                state["healthy"] -= 1
+                last_worker = state["healthy"] == 0
+            if not last_worker:
+                resource = STOP # another worker of this stage is still healthy, leave the disclosures to it
+
+    # fails a disclosure and reports it straight away
+    def fail(item, error):
+        func_name = error.func_name if isinstance(error, StepError) else stage.name
+        item.errors.append((func_name, str(error)))
+        checkpoint(item, func_name, error)
+        logging.warning(f"{item.sCleanID} - {func_name} failed: {str(error)}")
+        results.put(item)
+
+    # sends a processed disclosure on to the next stage (or to the results if it failed or this is the last stage)
+    def finish(item):
+        forward(item)
+
+    # fails a disclosure taken from the inbox straight away (and returns True) if cancelled or the worker couldn't start
+    def refuse(item):
+        if cancel_event.is_set():
+            fail(item, StepError(stage.name, "cancelled"))
+        elif setup_error is not None:
+            fail(item, StepError(stage.name, setup_error))
+        else:
+            return False
+        return True
+
+    # takes disclosures from the inbox until STOP
+    def pull():
+        for item in iter(inbox.get, STOP):
+            if not refuse(item):
+                yield item
+
+    try:
+        if resource is STOP:
+            pass
+        elif stage.batch:
+            taken = [] # disclosures handed to the stage that haven't come back yet
+            stopped = [] # gets STOP once the stage has taken it
+            # only blocks on the inbox while the stage has nothing in progress,
+            # otherwise yields None when it is empty so the stage can go back to the disclosures it has
+            def pull_tracked():
+                while True:
+                    item = inbox.get_nowait() if taken else inbox.get()
+                    if item is STOP:
+                        stopped.append(item)
+                        return
+                    if item is None:
+                        yield None
+                    elif not refuse(item):
+                        taken.append(item)
+                        yield item
+            try:
+                for item in stage.func(resource, pull_tracked()):
+                    taken.remove(item)
+                    finish(item)
+                # a stage that stopped early (cancelled) fails what is still waiting so the stages before it don't block
+                if not stopped:
+                    for item in pull():
+                        fail(item, StepError(stage.name, "stopped before it was processed"))
+            except Exception as e:
+                logging.warning(f"{stage.name} worker stopped: {str(e)}")
+                for item in taken + ([] if stopped else list(pull())):
+                    fail(item, e)
+        else:
+            for item in pull():
+                try:
+                    item = stage.func(resource, item)
+                except Exception as e:
+                    fail(item, e)
+                    continue
+                finish(item)
+    finally:
+        if stage.teardown and resource is not None and resource is not STOP:
+            try:
+                stage.teardown(resource)
+            except Exception as e:
+                logging.warning(f"{stage.name} worker failed to close: {str(e)}")
+        # the last worker of a stage tells every worker of the next stage to stop
+        with state["lock"]:
+            state["running"] -= 1
+            last_worker = state["running"] == 0
+        if last_worker and outbox is not None:
+            outbox.stop(next_workers)
+
+
+# THE PIPELINE ENGINE
+    # pushes every item through the stages and returns (successes, failures) as lists of items
+    # on_result(item) is called in the calling thread as each disclosure finishes (successful or not), in completion order
+    # queue_size bounds how many disclosures can wait in front of each stage
+    # setting cancel_event makes the workers fail the remaining disclosures instead of processing them
+    # and stops the waits of the ones in progress (see wait_functions.cancel_waits_on)
+    # every wait the workers make is added to wait_log (a wait_functions.WaitLog) when one is given
+    # and the requests their browsers block are counted in route_stats (a route_filter.RouteStats)
+def run_pipeline(items, stages, queue_size=2, on_result=None, cancel_event=None, wait_log=None, route_stats=None):
+    items = list(items)
+    cancel_event = cancel_event or threading.Event()
+    inboxes = [Inbox(queue_size) for _ in stages]
+    results = queue.Queue()
+
+    # puts an item in front of stage index, passing over the stages that skip it (to the results after the last stage or if it failed)
+        # an item sent past a stage always lands before that stage's STOP markers, because the stage only stops after everything before it has
+    def skips(stage, item):
+        try:
+            return stage.skip is not None and stage.skip(item)
+        except Exception as e:
+            logging.warning(f"{item.sCleanID} - {stage.name} skip check failed: {str(e)}")
+            return False
+
+    def route(index, item):
+        while index < len(stages) and not item.errors and skips(stages[index], item):
+            index += 1
+        if item.errors or index == len(stages):
+            results.put(item)
+        else:
+            inboxes[index].put(item)
+
+    threads = []
+    for index, stage in enumerate(stages):
+        last_stage = index == len(stages) - 1
+        outbox = None if last_stage else inboxes[index + 1]
+        next_workers = 0 if last_stage else stages[index + 1].workers
+        state = {"lock": threading.Lock(), "running": stage.workers, "healthy": stage.workers}
+        for number in range(stage.workers):
+            thread = threading.Thread(
+                target=_worker,
+                args=(stage, inboxes[index], outbox, lambda item, index=index: route(index + 1, item), next_workers, results, state, cancel_event, wait_log, route_stats),
+                name=f"{stage.name}-{number + 1}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+    # feeds the first stage from its own thread so the bounded queue can't block the results loop
+    def feed():
+        for item in items:
+            route(0, item)
+        inboxes[0].stop(stages[0].workers)
+    threading.Thread(target=feed, name="pipeline-feeder", daemon=True).start()
+
+    successes, failures = [], []
+    for _ in range(len(items)):
+        item = results.get()
+        (failures if item.errors else successes).append(item)
+        if on_result:
+            on_result(item)
+
+    for thread in threads:
+        thread.join()
+    return successes, failures
+
+
+# --- STAGES FOR THE TTO WORKFLOW ---
+
+# The persistent profile of the current worker thread (every worker thread and shard process gets its own in "profile" mode)
+def worker_profile_name():
+    return f"{multiprocessing.current_process().name}-{threading.current_thread().name}"
+
+# Opens a browser for one worker thread, returns (playwright, browser, context, page)
+    # headless -> True/False to choose, None lets playwright_launcher decide (headless_mode in config.py)
+def open_browser(headless=None):
+    p = sync_playwright().start()
+    try:
+        browser, context, page = run(p, worker_profile_name(), headless)
+    except Exception:
+        p.stop()
+        raise
+    return p, browser, context, page
+
+def close_browser(session):
+    p, browser, context, page = session
+    try:
+        browser.close()
+    finally:
+        p.stop()
+
+
+# Opens a browser and logs it in with login(page, interactive), returns the browser session
+    # starts headless when there is a saved login (headless_mode "auto"), and only if that login has expired
+    # closes it and opens one with a window for the manual login
+def open_logged_in(login):
+    headless = use_headless(worker_profile_name())
+    session = open_browser(headless)
+    try:
+        login(session[3], not headless)
+        return session
+    except LoginRequiredError as e:
+        close_browser(session)
+        logging.info(f"{str(e)}, opening a browser window for the login")
+    except Exception:
+        close_browser(session)
+        raise
+
+    session = open_browser(headless=False)
+    try:
+        login(session[3], True)
+    except Exception:
+        close_browser(session)
+        raise
+    return session
+
+
+# Fills in a disclosure from the summary cache, returns True if it was cached (used to skip the FirstIgnite stage)
+def use_cached_summary(item, refresh=summary_cache_refresh):
+    entry = load_summary(item.filePath, refresh)
+    if entry is None:
+        return False
+    item.summaryText = entry["summaryText"]
+    item.fields = entry["fields"]
+    logging.info(f"{item.sCleanID} - using the cached FirstIgnite summary")
+    return True
+
+
+# FIRST IGNITE stage -> uploads the disclosure and extracts the summary text
+    # login_wait -> most seconds to wait for a manual FirstIgnite login when the saved session has expired
+    # tabs -> how many FirstIgnite tabs each worker keeps running at once (more than 1 uses the tab pool)
+    # use_cache -> disclosures with a cached summary skip this stage, refresh=True gets every summary from FirstIgnite again
+    # the browser only opens when the first disclosure without a cached summary arrives, so a fully cached batch never logs in
+    # every batch starts by deleting the cached summaries that are too old to be used
+def first_ignite_stage(workers=1, login_wait=login_wait_seconds, tabs=1, use_cache=use_summary_cache, refresh=summary_cache_refresh):
+    if use_cache:
+        iPruned = prune_cache()
+        if iPruned:
+            logging.info(f"Summary cache: removed {iPruned} expired entries")
+
+    def setup():
+        return {"session": None, "pool": None, "error": None}
+
+    # opens (and logs in) the worker's browser the first time it is needed, a failed start fails every disclosure after it too
+    def browser(resource):
+        if resource["error"] is not None:
+            raise resource["error"]
+        if resource["session"] is None:
+            try:
+                session = open_logged_in(lambda page, interactive: ensure_firstignite_session(page, login_wait, interactive))
+            except Exception as e:
+                resource["error"] = e
+                raise
+            resource["session"] = session
+            resource["pool"] = PagePool(session[2], max_pages=tabs)
+            resource["pool"].add(session[3])
+        return resource["session"]
+
+    def teardown(resource):
+        if resource["session"] is not None:
+            resource["pool"].close()
+            close_browser(resource["session"])
+
+    def save(item):
+        if use_cache:
+            save_summary(item.filePath, item.summaryText)
+
+    def process(resource, item):
+        browser(resource)
+        with resource["pool"].lease() as page:
+            page.goto(FIRSTIGNITE_URL)
+            item.summaryText = run_item_step(item, "launch_first_ignite", launch_first_ignite, page, item.filePath)
+        save(item)
+        return item
+
+    def process_batch(resource, items):
+        first = next(items, None)
+        if first is None:
+            return
+        session = browser(resource)
+        waiting = {first.filePath: first} # filePath -> disclosure
+        def filePaths():
+            yield first.filePath
+            for item in items:
+                if item is not None: # None -> no disclosure waiting right now
+                    waiting[item.filePath] = item
+                    item = item.filePath
+                yield item
+        for filePath, summaryText, error in iter_first_ignite_pool(session[2], filePaths(), tabs, pool=resource["pool"]):
+            item = waiting.pop(filePath)
+            if error is not None:
+                item.errors.append(("launch_first_ignite", str(error)))
+                logging.warning(f"{item.sCleanID} - launch_first_ignite failed: {str(error)}")
+                checkpoint(item, "launch_first_ignite", error)
+            else:
+                item.summaryText = summaryText
+                checkpoint(item, "launch_first_ignite")
+                save(item)
+            yield item
+
+    skip = (lambda item: use_cached_summary(item, refresh)) if use_cache else None
+    if tabs > 1:
+        return Stage("FirstIgnite", process_batch, workers, setup, teardown, batch=True, skip=skip)
+    return Stage("FirstIgnite", process, workers, setup, teardown, skip=skip)
+
+
+# PDF stage -> formats the summary and creates the sell sheet
+    # a summary from the cache may already be parsed, otherwise the parsed fields are added to its cache entry
+    # a sell sheet an earlier run of the batch already created (and that is still there) isn't created again
+    # the sell sheet is kept in item.pdfBytes for the upload, and also written to export_folder unless write_files=False
+def pdf_stage(workers=1, export_folder=".", banner_path="Images/banner.png", footer_banner_path="Images/footer banner.png",
+              use_cache=use_summary_cache, write_files=write_sell_sheets):
+    def process(resource, item):
+        if item.fields is None:
+            item.fields = run_item_step(item, "format_summary", format_summary, item.summaryText)
+            if use_cache:
+                save_summary(item.filePath, item.summaryText, item.fields)
+
+        created = item.completed.get("create_pdf")
+        if created and created.get("exportFolder") and os.path.exists(sell_sheet_path(item.sCleanID, created["exportFolder"])):
+            item.exportFolder = created["exportFolder"]
+            return item
+
+        sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = item.fields
+        item.pdfBytes = run_step(
+            "create_pdf", create_pdf, sTitle, item.sCleanID, sExecutiveStatement, sDescription,
+            lstAdvantages, lstProblemsSolved, lstMarketApplications, banner_path, footer_banner_path, export_folder, True
+        )
+        if write_files:
+            item.exportFolder = run_step("create_pdf", save_sell_sheet, item.sCleanID, item.pdfBytes, export_folder)
+        checkpoint(item, "create_pdf", exportFolder=item.exportFolder)
+        return item
+
+    return Stage("PDF", process, workers)
+
+
+# The Brightspot steps for one disclosure, in order, as (function, func_name, arguments after the page)
+def brightspot_steps(item, tagTypeSelections=None, include_images=False):
+    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = item.fields
+    sCleanID = item.sCleanID
+    steps = [
+        (bs_template_click, "bs_template_click", ()),
+        (bs_display_internal_name, "bs_display_internal_name", (sTitle, sCleanID)),
+        (bs_title_techID, "bs_title_techID", (sTitle, sCleanID)),
+        (bs_executive_statement, "bs_executive_statement", (sExecutiveStatement,)),
+    ]
+    if include_images:
+        steps.append((bs_image_main_page, "bs_image_main_page", (sCleanID,)))
+    steps += [
+        (bs_technology_overview, "bs_technology_overview", (sDescription,)),
+        (bs_key_advantages, "bs_key_advantages", (lstAdvantages,)),
+        (bs_problems_addressed, "bs_problems_addressed", (lstProblemsSolved,)),
+        (bs_market_applications, "bs_market_applications", (lstMarketApplications,)),
+        (bs_additional_information, "bs_additional_information", (sCleanID,)),
+        (bs_upload_pdf, "bs_upload_pdf", (sCleanID, item.exportFolder, item.pdfBytes)),
+        (bs_year_tag, "bs_year_tag", (sCleanID,)),
+    ]
+    if tagTypeSelections:
+        steps.append((bs_type_tag, "bs_type_tag", (sCleanID, tagTypeSelections)))
+    steps.append((bs_contact_link, "bs_contact_link", ()))
+    steps.append((bs_override_description, "bs_override_description", (sCleanID,)))
+    if include_images:
+        steps.append((bs_override_image, "bs_override_image", (sCleanID,)))
+    steps.append((bs_publish, "bs_publish", (False,))) # the page is closed (or reset for the next disclosure) by whoever opened it
+    return steps
+
+
+# BRIGHTSPOT stage -> logs in, fills in the technology page and publishes it
+    # userUsername/userPassword -> logs in with bs_login, leave them empty to use the saved session or log in by hand (at most login_wait seconds)
+    # each worker logs in once when it starts and only again if Brightspot redirects a page to the login page (see sessions.BrightspotSession)
+    # stop_on_error -> stop at the first failed step (otherwise every step is tried and the failures are logged, like index.py)
+    # backend="api" -> creates the pages over the Brightspot API instead (brightspot_api_stage, the login settings aren't used)
+def brightspot_stage(workers=1, userUsername="", userPassword="", login_wait=login_wait_seconds, stop_on_error=False,
+                     tagTypeSelections=None, include_images=False, backend=brightspot_backend):
+    if backend == "api":
+        return brightspot_api_stage(workers, tagTypeSelections, include_images)
+
+    def setup():
+        login = BrightspotSession(userUsername, userPassword, login_wait)
+        def open_page(page, interactive):
+            login.interactive = interactive
+            login.open(page)
+        session = open_logged_in(open_page)
+        pool = PagePool(session[2])
+        pool.add(session[3])
+        return session, login, pool
+
+    # every disclosure leases a page from the worker's pool, it is reset afterwards (or replaced if a step failed on it)
+    def process(resource, item):
+        session, login, pool = resource
+        page = pool.acquire()
+        try:
+            run_step("bs_login", login.open, page) # can't continue without login
+
+            for func, func_name, args in brightspot_steps(item, tagTypeSelections, include_images):
+                try:
+                    run_item_step(item, func_name, func, page, *args)
+                except StepError as e:
+                    if stop_on_error:
+                        raise
+                    item.errors.append((func_name, str(e)))
+                    logging.warning(f"{item.sCleanID} - {func_name} failed: {str(e)}")
+                    checkpoint(item, func_name, e)
+        finally:
+            pool.release(page, healthy=not item.errors)
+        return item
+
+    def teardown(resource):
+        session, login, pool = resource
+        logging.info(f"Brightspot worker logged in {login.logins} time(s), recycled {pool.recycled} page(s)")
+        pool.close()
+        close_browser(session)
+
+    return Stage("Brightspot", process, workers, setup, teardown)
+
+
+# BRIGHTSPOT stage over the API -> uploads the sell sheet and creates and publishes the page in a few HTTP requests (see brightspot_api.py)
+    # no browser, every worker just keeps its own connection to the endpoint
+def brightspot_api_stage(workers=1, tagTypeSelections=None, include_images=False):
+    def process(api, item):
+        run_step("publish_technology", publish_technology, api, item.sCleanID, item.fields, item.exportFolder,
+                 tagTypeSelections, include_images, lambda func_name: checkpoint(item, func_name), item.pdfBytes)
+        return item
+
+    return Stage("Brightspot", process, workers, BrightspotAPI, lambda api: api.session.close())
@@ -7,21 +7,33 @@
 from playwright.sync_api import sync_playwright
 import platform
 import asyncio
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from config import browser_session_mode, storage_state_path, browser_profile_folder, use_route_filter, headless_mode
+from route_filter import install_route_filter
+
+# Sites whose login cookies count as a saved session
+SESSION_DOMAINS = ("firstignite.com", "brightspot.byu.edu")
+
+# Seconds from 1601-01-01 (the clock Chromium's cookie database uses) to 1970-01-01
+CHROMIUM_EPOCH_OFFSET = 11644473600
 
 def setup_windows_event_loop():
     """Setup Windows-specific event loop policy to avoid asyncio issues."""
     if platform.system() == "Windows":
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-# Function that opens the Chrome browser, goes to FirstIgnite, uploads the disclosure (in a for loop), and calls the function to create the sell sheet pdf
-def run(p):
-    # Setup Windows event loop if needed
-    setup_windows_event_loop()
-    
+# Chromium launch options for this platform
+    # headless=True runs without a window (no display or GPU compositing needed, much less memory per browser)
+    # headless=False keeps the window visible for a manual login
+def launch_options(headless=False):
     if platform.system() == "Windows":
         # Windows-specific configuration to avoid asyncio issues
-        browser = p.chromium.launch(
-            headless=False,  # Keep visible for manual login
+        return dict(
+            headless=headless,
             args=[
                 "--disable-blink-features=AutomationControlled",
                 "--no-sandbox",
@@ -32,12 +44,110 @@ def run(p):
                 "--disable-features=VizDisplayCompositor"
             ]
         )
-    else:
-        # Mac/Linux standard configuration
-        browser = p.chromium.launch(
-            headless=False,  # Keep visible for manual login
-            args=["--disable-blink-features=AutomationControlled"]
+    if headless and platform.system() == "Linux":
+        # unattended runs on the Linux automation host: /dev/shm is small in containers and there is no GPU,
+        # and the background services only cost memory when nobody is looking at the browser
+        return dict(
+            headless=True,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                "--disable-dev-shm-usage",
+                "--disable-gpu",
+                "--disable-extensions",
+                "--disable-background-networking",
+                "--disable-component-update",
+                "--disable-default-apps",
+                "--disable-sync",
+                "--mute-audio",
+                "--no-first-run",
+            ]
         )
-    context = browser.new_context()
+    # Mac/Linux standard configuration
+    return dict(
+        headless=headless,
+        args=["--disable-blink-features=AutomationControlled"]
+    )
+
+# Options for a new browser context (loads the saved logins in "storage_state" mode)
+def context_options():
+    if browser_session_mode == "storage_state" and os.path.exists(storage_state_path):
+        return {"storage_state": storage_state_path}
+    return {}
+
+# Folder of the persistent profile used in "profile" mode (every browser needs its own, Chromium locks it while open)
+def profile_path(profile_name):
+    return os.path.join(browser_profile_folder, profile_name)
+
+# True for a cookie of one of the automation sites that hasn't expired (expires in seconds since 1970, -1 for a session cookie)
+def is_login_cookie(domain, expires):
+    domain = domain.lstrip(".")
+    if not any(domain == site or domain.endswith("." + site) for site in SESSION_DOMAINS):
+        return False
+    return expires == -1 or expires > time.time()
+
+# (domain, expires) of every cookie in the storage state file
+def saved_cookies():
+    try:
+        with open(storage_state_path, "r", encoding="utf-8") as f:
+            return [(cookie["domain"], cookie.get("expires", -1)) for cookie in json.load(f).get("cookies", [])]
+    except (OSError, ValueError, KeyError, AttributeError):
+        return []
+
+# (domain, expires) of every cookie in a persistent profile's cookie database
+    # read without locking it (immutable), the values are encrypted but the domains and expiry dates aren't
+def profile_cookies(profile_name):
+    for parts in (("Default", "Network", "Cookies"), ("Default", "Cookies")):
+        path = os.path.join(profile_path(profile_name), *parts)
+        if not os.path.exists(path):
+            continue
+        try:
+            connection = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro&immutable=1", uri=True)
+            try:
+                rows = connection.execute("SELECT host_key, expires_utc, has_expires FROM cookies").fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return []
+        return [(host, expires / 1e6 - CHROMIUM_EPOCH_OFFSET if has_expires else -1) for host, expires, has_expires in rows]
+    return []
+
+# True if there is a saved login to start the browser with (an unexpired FirstIgnite or Brightspot cookie)
+def has_saved_session(profile_name="default"):
+    if browser_session_mode == "storage_state":
+        cookies = saved_cookies()
+    elif browser_session_mode == "profile":
+        cookies = profile_cookies(profile_name)
+    else:
+        return False
+    return any(is_login_cookie(domain, expires) for domain, expires in cookies)
+
+# Whether to start the browser headless (headless_mode in config.py)
+    # "auto" -> headless when there is a saved login to reuse, with a window when someone will have to log in
+def use_headless(profile_name="default"):
+    if headless_mode == "auto":
+        return has_saved_session(profile_name)
+    return headless_mode == "always"
+
+# Function that opens the Chrome browser, goes to FirstIgnite, uploads the disclosure (in a for loop), and calls the function to create the sell sheet pdf
+    # profile_name -> which persistent profile to open in "profile" mode
+    # headless -> True/False to choose, None decides with use_headless()
+    # a persistent profile has no separate Browser object, so the context is returned in its place (it has close() too)
+def run(p, profile_name="default", headless=None):
+    # Setup Windows event loop if needed
+    setup_windows_event_loop()
+    if headless is None:
+        headless = use_headless(profile_name)
+
+    if browser_session_mode == "profile":
+        context = p.chromium.launch_persistent_context(profile_path(profile_name), **launch_options(headless))
+        if use_route_filter:
+            install_route_filter(context) # blocks images, fonts, video and trackers (route_filter.py)
+        page = context.pages[0] if context.pages else context.new_page()
+        return context, context, page
+
+    browser = p.chromium.launch(**launch_options(headless))
+    context = browser.new_context(**context_options())
+    if use_route_filter:
+        install_route_filter(context) # blocks images, fonts, video and trackers (route_filter.py)
     page = context.new_page()
     return browser, context, page
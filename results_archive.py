@@ -0,0 +1,56 @@
+# RESULTS ARCHIVE
+    # The ZIP of sell sheets app.py offers for download, built one sheet at a time as each disclosure finishes
+    # instead of keeping every sheet in memory and zipping them all at the end
+    # it is written to a spooled temporary file: kept in memory up to results_spool_mb, moved to a temporary file on disk after that
+    # PDFs are already compressed, so they are stored as they are (ZIP_STORED), anything else is deflated
+    # st.download_button keeps whatever it is given in memory (Streamlit has no streaming download), so once finished
+    # the archive is read out of the spool once and read() hands the same bytes to every rerun and session
+    # instead of a new copy each time (the spool, and its temporary file if it went to disk, is closed then)
+
+# IMPORTS
+import tempfile
+import threading
+import zipfile
+
+from config import results_spool_mb
+
+
+class ResultsArchive:
+    def __init__(self, spool_mb=results_spool_mb):
+        self.spool_bytes = int(spool_mb * 1024 * 1024)
+        self.file = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        self.zip = zipfile.ZipFile(self.file, "w")
+        self.names = []
+        self.lock = threading.Lock() # several sessions can download the same job's archive
+        self.data = None # the finished archive (read out of the spool once, see read())
+
+    def __len__(self):
+        return len(self.names)
+
+    # Adds one file to the archive (skipped if one with that name is already in it, a ZIP would keep both)
+    def add(self, filename, content):
+        if filename in self.names:
+            return
+        compress_type = zipfile.ZIP_STORED if filename.lower().endswith(".pdf") else zipfile.ZIP_DEFLATED
+        self.zip.writestr(filename, content, compress_type=compress_type)
+        self.names.append(filename)
+
+    # Finishes the ZIP (writes its directory) and reads it out of the spool, no more files can be added afterwards
+    def close(self):
+        if self.zip is None:
+            return
+        self.zip.close()
+        self.zip = None
+        with self.file:
+            self.file.seek(0)
+            self.data = self.file.read()
+
+    # Size of the archive in bytes
+    def size(self):
+        return len(self.read())
+
+    # The finished archive for st.download_button, the same bytes object for every caller
+    def read(self):
+        with self.lock:
+            self.close()
+            return self.data
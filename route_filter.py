@@ -0,0 +1,143 @@
+# ROUTE FILTER
+    # Aborts the requests the automation never needs (images, fonts, video, analytics and ad trackers)
+    # so pages load faster and every tab uses less memory
+    # the rules are per site in config.route_rules (the site is the host of the page making the request):
+    #   block_types   -> resource types aborted on that site (image, media, font, stylesheet, ...)
+    #   allow_domains -> hosts that are never blocked (login and Duo pages, for example)
+    #   block_domains -> hosts that are always blocked
+    # sites without their own rules use route_rules["default"], and the domain lists of "default" apply to every site
+    # install_route_filter(context) is called by playwright_launcher.run() for every context it makes
+    # only the URLs that can be blocked are routed (route_pattern: the blocked domains and the file extensions of the
+    # blocked types), routing a request turns off the browser's HTTP cache for it, so every other script and stylesheet
+    # still comes from the cache (a blocked type is only caught when its URL ends in one of TYPE_EXTENSIONS)
+    # each run counts into its own RouteStats (see count_routes_in), route_report(stats) says how many requests were
+    # blocked and an estimate of the bytes that saved
+
+# IMPORTS
+import re
+import threading
+from urllib.parse import urlparse
+
+from config import route_rules
+
+# File extensions of the resource types that can be blocked (used to route only the URLs that might be blocked)
+TYPE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m4a", "mov", "m3u8", "ts"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+    "script": ["js", "mjs"],
+}
+
+# Rough size of one response of each type, used to estimate the bytes saved (aborted requests never say how big they were)
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 1_000_000,
+    "font": 50_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 10_000,
+}
+
+
+# Counts of what the filter let through and blocked in one run (shared by every context the run opens)
+    # allowed only counts the routed requests that were let through, requests route_pattern doesn't match are never seen
+class RouteStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.allowed = 0
+        self.blocked = {} # reason -> number of requests
+        self.estimated_bytes = 0 # from ESTIMATED_BYTES, not measured
+
+    def count(self, reason, resource_type):
+        with self.lock:
+            if reason is None:
+                self.allowed += 1
+            else:
+                self.blocked[reason] = self.blocked.get(reason, 0) + 1
+                self.estimated_bytes += ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES["other"])
+
+
+# The RouteStats the contexts opened on the current thread count into (set by count_routes_in)
+_run = threading.local()
+
+# Makes the contexts opened on the current thread count into stats (the pipeline calls it in each worker thread)
+def count_routes_in(stats):
+    _run.stats = stats
+
+
+def host_of(url):
+    return (urlparse(url).hostname or "").lower()
+
+def host_matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+# The rules for the site a page is on
+def site_rules(page_host, rules=route_rules):
+    for site, site_rule in rules.items():
+        if site != "default" and host_matches(page_host, [site]):
+            return site_rule
+    return rules.get("default", {})
+
+
+# Why a request should be blocked ("type:image", "domain:google-analytics.com") or None to let it through
+def block_reason(url, resource_type, page_url, rules=route_rules):
+    host = host_of(url)
+    site_rule = site_rules(host_of(page_url) or host, rules)
+    default_rule = rules.get("default", {})
+
+    if host_matches(host, site_rule.get("allow_domains", []) + default_rule.get("allow_domains", [])):
+        return None
+    for domain in site_rule.get("block_domains", []) + default_rule.get("block_domains", []):
+        if host_matches(host, [domain]):
+            return f"domain:{domain}"
+    if resource_type in site_rule.get("block_types", []):
+        return f"type:{resource_type}"
+    return None
+
+
+# The URL of the page a request belongs to (the request's own URL for a page load or a service worker)
+def page_url_of(request):
+    try:
+        return request.frame.page.url or request.url
+    except Exception:
+        return request.url
+
+
+def handle_route(route, stats):
+    request = route.request
+    reason = block_reason(request.url, request.resource_type, page_url_of(request))
+    stats.count(reason, request.resource_type)
+    if reason is None:
+        route.fallback()
+    else:
+        route.abort("blockedbyclient")
+
+
+# The URLs the filter has to see: every blocked domain (and its subdomains) and the extensions of every blocked type
+def route_pattern(rules=route_rules):
+    domains = sorted({domain for rule in rules.values() for domain in rule.get("block_domains", [])})
+    extensions = sorted({extension for rule in rules.values() for resource_type in rule.get("block_types", [])
+                         for extension in TYPE_EXTENSIONS.get(resource_type, [])})
+    patterns = []
+    if domains:
+        patterns.append(r"^[a-z]+://([^/?#]*\.)?(" + "|".join(re.escape(domain) for domain in domains) + r")(:\d+)?([/?#]|$)")
+    if extensions:
+        patterns.append(r"\.(" + "|".join(extensions) + r")([?#]|$)")
+    return re.compile("|".join(patterns) or r"(?!)", re.IGNORECASE)
+
+
+# Adds the filter to a browser context (every page opened in it afterwards is filtered)
+    # stats -> the RouteStats to count into, by default the current thread's (count_routes_in) or a new one
+def install_route_filter(context, stats=None):
+    stats = stats or getattr(_run, "stats", None) or RouteStats()
+    context.route(route_pattern(), lambda route: handle_route(route, stats))
+    return stats
+
+
+# Returns (requests allowed, requests blocked, estimated bytes saved, {reason: count}) for one run's RouteStats
+def route_report(stats):
+    with stats.lock:
+        return stats.allowed, sum(stats.blocked.values()), stats.estimated_bytes, dict(stats.blocked)
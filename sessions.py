@@ -0,0 +1,150 @@
+# SESSIONS
+    # Checks whether a browser is still logged into FirstIgnite/Brightspot before a batch starts
+    # if the saved session (storage state or persistent profile, see config.py) is still valid it returns right away,
+    # otherwise it leaves time for a manual login and saves the new session for the next run
+    # BrightspotSession logs a Brightspot browser in once and only logs in again when Brightspot sends it back to the login page
+
+# IMPORTS
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from first_ignite import FIRSTIGNITE_URL
+from brightspot_functions import BRIGHTSPOT_HOME_URL, in_cms, bs_login
+from wait_functions import wait_until, WaitTimeoutError
+from config import browser_session_mode, storage_state_path, login_wait_seconds
+
+# How long a headless browser waits for a page to show it is logged in before deciding it needs a login
+HEADLESS_LOGIN_CHECK_SECONDS = 15
+
+# Several workers can finish logging in at the same time, only one writes the state file at once
+    # (_save_lock for the threads of this process, the lock file next to the state file for the shard processes)
+_save_lock = threading.Lock()
+STATE_LOCK_SECONDS = 10
+
+
+# Raised when a browser without a window (headless) isn't logged in, since nobody can log in there
+    # the pipeline then reopens the browser with a window (see pipeline.open_logged_in)
+class LoginRequiredError(Exception):
+    pass
+
+# True once the FirstIgnite autopilot page has loaded for a logged in user (the file toggle only shows when logged in)
+def firstignite_ready(page):
+    return page.locator("div").filter(has_text=re.compile(r"^TextFile$")).count() > 0
+
+# True once the browser is inside the Brightspot CMS (an expired session redirects to the login page)
+def brightspot_ready(page):
+    return in_cms(page)
+
+
+# Adds the cookies and local storage of a new state to a saved one, the new values win
+    # (each browser is only logged into one site, so saving it must not drop the other site's login)
+def merge_states(saved, state):
+    cookies = {(cookie["name"], cookie["domain"], cookie["path"]): cookie for cookie in saved.get("cookies", [])}
+    cookies.update({(cookie["name"], cookie["domain"], cookie["path"]): cookie for cookie in state.get("cookies", [])})
+    origins = {origin["origin"]: origin for origin in saved.get("origins", [])}
+    origins.update({origin["origin"]: origin for origin in state.get("origins", [])})
+    return {"cookies": list(cookies.values()), "origins": list(origins.values())}
+
+
+# Holds the lock file of the state file while the block runs (taken over if its owner died holding it)
+class StateFileLock:
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        deadline = time.monotonic() + STATE_LOCK_SECONDS
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    logging.warning(f"Taking over the stale lock {self.path}")
+                    return self
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# Saves the cookies and local storage of a logged in context so the next run can skip the login
+    # the FirstIgnite and Brightspot browsers (and every shard process) share the state file, so the context's state is
+    # merged into what is saved and the file is replaced in one step
+def save_session(context, path=storage_state_path):
+    if browser_session_mode != "storage_state":
+        return
+    state = context.storage_state()
+    with _save_lock, StateFileLock(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = merge_states(json.load(f), state)
+        except (OSError, ValueError):
+            pass # no saved state yet (or a broken one), this context's state replaces it
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+
+# Waits until the page shows the site logged in, then saves the session
+    # returns straight away when the saved session is still valid, raises WaitTimeoutError if nobody logs in within login_wait seconds
+    # interactive=False (a headless browser) raises LoginRequiredError instead of waiting for a manual login
+def wait_for_login(page, logged_in, site, login_wait=login_wait_seconds, interactive=True):
+    if not interactive:
+        try:
+            wait_until(page, lambda: logged_in(page), timeout=HEADLESS_LOGIN_CHECK_SECONDS, description=f"the saved {site} session")
+        except WaitTimeoutError:
+            raise LoginRequiredError(f"{site} needs a login (the saved session has expired)") from None
+        return
+    if not logged_in(page):
+        logging.info(f"{site} session is not logged in, waiting up to {login_wait}s for a manual login")
+    try:
+        wait_until(page, lambda: logged_in(page), timeout=login_wait, description=f"a {site} login", label=f"login:{site}")
+    except WaitTimeoutError:
+        raise WaitTimeoutError(f"Not logged into {site} after {login_wait}s, log in in the browser window and run it again") from None
+    save_session(page.context)
+
+
+# Opens FirstIgnite and makes sure the browser is logged in
+def ensure_firstignite_session(page, login_wait=login_wait_seconds, interactive=True):
+    page.goto(FIRSTIGNITE_URL)
+    wait_for_login(page, firstignite_ready, "FirstIgnite", login_wait, interactive)
+
+# The Brightspot login of one browser, shared by every disclosure that browser enters
+    # open(page) takes a new page to the CMS home page and only logs in when Brightspot redirects it to logIn.jsp
+    # (the first page of the batch or after the session expires), instead of logging in for every disclosure
+    # without a username it waits for a manual login instead of calling bs_login (or raises LoginRequiredError if interactive is False)
+    # raises LoginRequiredError when bs_login doesn't end up in the CMS
+class BrightspotSession:
+    def __init__(self, userUsername="", userPassword="", login_wait=login_wait_seconds, interactive=True):
+        self.userUsername = userUsername
+        self.userPassword = userPassword
+        self.login_wait = login_wait
+        self.interactive = interactive
+        self.logins = 0 # how many times this browser actually had to log in
+
+    def open(self, page):
+        page.goto(BRIGHTSPOT_HOME_URL)
+        if brightspot_ready(page):
+            return
+        if self.userUsername and "logIn.jsp" in page.url:
+            logging.info("Brightspot session is not logged in, logging in")
+            try:
+                bs_login(page, self.userUsername, self.userPassword)
+            except WaitTimeoutError as e:
+                raise LoginRequiredError(f"Brightspot login failed: {str(e)}") from None
+            page.goto(BRIGHTSPOT_HOME_URL) # bs_login can land on any CMS page, the steps start from the home page
+            # only a login that actually got into the CMS is saved and counted (wrong password, Duo not approved...)
+            if not brightspot_ready(page):
+                raise LoginRequiredError(f"Brightspot login failed, still not in the CMS ({page.url})")
+            save_session(page.context)
+        else:
+            wait_for_login(page, brightspot_ready, "Brightspot", self.login_wait, self.interactive)
+        self.logins += 1
@@ -0,0 +1,143 @@
+# SHARD COORDINATOR
+    # For very large disclosure folders: splits the PDFs into shards and runs each shard in its own process,
+    # each with its own Playwright browsers running the normal pipeline (pipeline.py)
+    # the workers send their progress back over a queue and the coordinator merges everything into one report
+    # every shard records its steps in its own journal (config.shard_journal_path), so with resume_batch = True
+    # each shard picks up where it stopped (the same files and shard_count give every shard the same files again)
+    # run it directly to process config.pdfFiles:  python shard_coordinator.py
+
+# IMPORTS
+import json
+import logging
+import multiprocessing
+import os
+import queue
+
+from formatting_functions import get_clean_id
+from config import shard_count, firstignite_workers, firstignite_tabs, pdf_workers, brightspot_workers, pipeline_queue_size, shard_journal_path, resume_batch
+
+
+# Splits the files into shard_count shards (round robin so every shard gets a mix of the folder)
+    # sorted first, so a resumed batch gives every shard the files its journal knows
+def split_shards(filePaths, shard_count):
+    filePaths = sorted(filePaths)
+    shards = [filePaths[i::shard_count] for i in range(max(1, shard_count))]
+    return [shard for shard in shards if shard]
+
+
+# Runs one shard in a worker process
+    # every message put on progress is a tuple that starts with its type and the shard number:
+    # ("started", shard, number of files) / ("result", shard, sCleanID, file name, errors) / ("crashed", shard, error) / ("done", shard)
+    # resume -> continue the shard's last batch in its journal, the disclosures it already published are reported as done
+def shard_worker(shard, filePaths, userUsername, userPassword, progress, resume=False):
+    # imported here so the coordinator process never loads Playwright
+    from pipeline import Disclosure, run_pipeline, first_ignite_stage, pdf_stage, brightspot_stage
+    from journal import Journal
+
+    progress.put(("started", shard, len(filePaths)))
+    try:
+        def on_result(item):
+            progress.put(("result", shard, item.sCleanID, os.path.basename(item.filePath), item.errors))
+
+        disclosures = [Disclosure(filePath, get_clean_id(os.path.basename(filePath))) for filePath in filePaths]
+        journal = Journal(shard_journal_path.format(shard=shard))
+        journal.start(resume=resume)
+        disclosures, published = journal.resume(disclosures)
+        for item in published:
+            on_result(item)
+
+        stages = [
+            first_ignite_stage(firstignite_workers, tabs=firstignite_tabs),
+            pdf_stage(pdf_workers),
+            brightspot_stage(brightspot_workers, userUsername, userPassword),
+        ]
+        run_pipeline(disclosures, stages, queue_size=pipeline_queue_size, on_result=on_result)
+    except Exception as e:
+        logging.warning(f"Shard {shard} crashed: {str(e)}")
+        progress.put(("crashed", shard, str(e)))
+    progress.put(("done", shard))
+
+
+# Runs every shard and merges the results
+    # on_progress(message, report) is called in this process for every message a worker sends
+    # returns the report: {"successes": [sCleanID, ...], "failures": [(file name, error), ...], "shards": {shard: counts}}
+def run_shards(filePaths, shards=shard_count, userUsername="", userPassword="", on_progress=None, resume=resume_batch):
+    context = multiprocessing.get_context("spawn") # a clean process for every browser, the same on every platform
+    progress = context.Queue()
+    lstShards = split_shards(list(filePaths), shards)
+
+    report = {"successes": [], "failures": [], "shards": {}}
+    processes = {}
+    for shard, shardFiles in enumerate(lstShards, start=1):
+        report["shards"][shard] = {"files": len(shardFiles), "finished": 0, "failed": 0, "crashed": None}
+        process = context.Process(target=shard_worker, args=(shard, shardFiles, userUsername, userPassword, progress, resume), name=f"shard-{shard}")
+        process.start()
+        processes[shard] = process
+
+    reported = {shard: set() for shard in processes} # file names each shard has reported back
+    running = set(processes)
+    while running:
+        try:
+            message = progress.get(timeout=5)
+        except queue.Empty:
+            # a worker that died without saying "done" (killed, out of memory) is marked as crashed
+            for shard in list(running):
+                if not processes[shard].is_alive():
+                    report["shards"][shard]["crashed"] = report["shards"][shard]["crashed"] or f"exit code {processes[shard].exitcode}"
+                    running.discard(shard)
+            continue
+
+        kind, shard = message[0], message[1]
+        if kind == "result":
+            sCleanID, sFileName, errors = message[2:]
+            reported[shard].add(sFileName)
+            report["shards"][shard]["finished"] += 1
+            if errors:
+                report["shards"][shard]["failed"] += 1
+                report["failures"].append((sFileName, " | ".join(f"{func_name}: {error}" for func_name, error in errors)))
+            else:
+                report["successes"].append(sCleanID)
+        elif kind == "crashed":
+            report["shards"][shard]["crashed"] = message[2]
+        elif kind == "done":
+            running.discard(shard)
+        if on_progress:
+            on_progress(message, report)
+
+    for process in processes.values():
+        process.join()
+
+    # anything a shard never reported back (because it crashed) counts as a failure
+    for shard, shardFiles in enumerate(lstShards, start=1):
+        for filePath in shardFiles:
+            sFileName = os.path.basename(filePath)
+            if sFileName not in reported[shard]:
+                report["failures"].append((sFileName, f"shard {shard} stopped before finishing ({report['shards'][shard]['crashed']})"))
+
+    logging.info(f"Sharded batch finished: {len(report['successes'])} succeeded, {len(report['failures'])} failed over {len(lstShards)} shard(s)")
+    return report
+
+
+# Prints one line per message from the workers
+def print_progress(message, report):
+    kind, shard = message[0], message[1]
+    counts = report["shards"][shard]
+    if kind == "started":
+        print(f"[shard {shard}] started with {message[2]} file(s)")
+    elif kind == "result":
+        status = "failed" if message[4] else "done"
+        print(f"[shard {shard}] {message[2]} {status} ({counts['finished']}/{counts['files']})")
+    elif kind == "crashed":
+        print(f"[shard {shard}] crashed: {message[2]}")
+
+
+if __name__ == "__main__":
+    from config import pdfFiles, user_login
+
+    userUsername, userPassword = user_login()
+    report = run_shards(pdfFiles, shard_count, userUsername, userPassword, on_progress=print_progress)
+
+    # saves the merged report next to the error log
+    with open("shard_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(report['successes'])} succeeded, {len(report['failures'])} failed (see shard_report.json)")
@@ -0,0 +1,79 @@
+# SUMMARY CACHE
+    # Keeps the FirstIgnite summary of every disclosure on disk so a re-run (after a Brightspot failure, for example)
+    # doesn't have to upload the disclosure and wait for FirstIgnite again
+    # entries are keyed by the SHA-256 of the disclosure PDF, so a renamed file still hits and an edited file misses
+    # each entry is one JSON file in summary_cache_folder: the raw summaryText and (once parsed) the format_summary fields
+    # entries older than summary_cache_days are ignored, refresh=True ignores every entry (and the new summary replaces it)
+
+# IMPORTS
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from config import summary_cache_folder, summary_cache_days
+
+
+# SHA-256 of a file, read in chunks so large disclosures aren't loaded into memory at once
+def file_hash(filePath):
+    digest = hashlib.sha256()
+    with open(filePath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def entry_path(sHash, folder=summary_cache_folder):
+    return os.path.join(folder, f"{sHash}.json")
+
+
+# Returns the cached entry for a disclosure as {"summaryText", "fields", "fileName", "saved"} or None
+    # fields is the format_summary tuple, or None if the summary was never parsed
+def load_summary(filePath, refresh=False, max_age_days=summary_cache_days, folder=summary_cache_folder):
+    if refresh:
+        return None
+    try:
+        with open(entry_path(file_hash(filePath), folder), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if max_age_days is not None and time.time() - entry.get("saved", 0) > max_age_days * 86400:
+        return None
+    if entry.get("fields") is not None:
+        entry["fields"] = tuple(entry["fields"])
+    return entry
+
+
+# Saves (or updates) the entry for a disclosure, never raises (the cache must not fail a disclosure)
+def save_summary(filePath, summaryText, fields=None, folder=summary_cache_folder):
+    try:
+        os.makedirs(folder, exist_ok=True)
+        path = entry_path(file_hash(filePath), folder)
+        entry = {"fileName": os.path.basename(filePath), "summaryText": summaryText,
+                 "fields": list(fields) if fields is not None else None, "saved": time.time()}
+        # writes to a temporary file first so a crash never leaves half an entry behind
+        # (a unique one, several threads and shard processes can save the same disclosure at once)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=folder, suffix=".tmp", delete=False) as f:
+            temp_path = f.name
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logging.warning(f"{os.path.basename(filePath)} - save_summary failed: {str(e)}")
+
+
+# Deletes the entries older than max_age_days (and temporary files a crashed save left behind), returns how many were removed
+    # run at the start of every batch (pipeline.first_ignite_stage), never raises
+def prune_cache(max_age_days=summary_cache_days, folder=summary_cache_folder):
+    removed = 0
+    if not os.path.isdir(folder):
+        return removed
+    for sName in os.listdir(folder):
+        path = os.path.join(folder, sName)
+        try:
+            if sName.endswith((".json", ".tmp")) and time.time() - os.path.getmtime(path) > max_age_days * 86400:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass # another process pruned it first
+    return removed
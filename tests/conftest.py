@@ -0,0 +1,8 @@
+# TEST SETUP
+    # the modules live in the repository folder (there is no package to install), so the tests import them from there
+    # run the tests from the repository folder:  python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
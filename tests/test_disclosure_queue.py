@@ -0,0 +1,117 @@
+# DISCLOSURE QUEUE TESTS
+    # a disclosure is claimed by one worker at a time, its lease lets another worker take it over if that worker dies,
+    # failures are retried up to max_attempts, and a worker that is stopped puts its disclosures back uncounted
+
+import os
+import time
+
+import pytest
+
+from disclosure_queue import DisclosureQueue, QueueJournal, journal_key
+from journal import Journal
+from pipeline import Disclosure
+
+
+@pytest.fixture
+def disclosure_queue(tmp_path):
+    return DisclosureQueue(str(tmp_path / "queue.db"), max_attempts=2, lease_minutes=60)
+
+
+def write_pdf(folder, sName, content):
+    filePath = os.path.join(folder, sName)
+    with open(filePath, "wb") as f:
+        f.write(content)
+    return filePath
+
+
+def status_of(disclosure_queue, sCleanID):
+    with disclosure_queue.connect() as db:
+        return db.execute("SELECT * FROM disclosures WHERE clean_id = ?", (sCleanID,)).fetchone()
+
+
+def test_enqueue_skips_the_same_file(disclosure_queue, tmp_path):
+    filePath = write_pdf(tmp_path, "2024-001.pdf", b"one")
+    copy = write_pdf(tmp_path, "2024-001 copy.pdf", b"one")
+    assert disclosure_queue.enqueue(filePath)
+    assert not disclosure_queue.enqueue(filePath)
+    assert not disclosure_queue.enqueue(copy)
+    assert disclosure_queue.counts() == {"queued": 1}
+
+
+def test_claim_takes_each_disclosure_once(disclosure_queue, tmp_path):
+    for i in range(3):
+        disclosure_queue.enqueue(write_pdf(tmp_path, f"2024-00{i}.pdf", f"file {i}".encode()))
+    first = disclosure_queue.claim("worker-1", limit=2)
+    second = disclosure_queue.claim("worker-2", limit=2)
+    assert [row["clean_id"] for row in first] == ["2024-000", "2024-001"]
+    assert [row["clean_id"] for row in second] == ["2024-002"]
+    assert all(row["attempts"] == 1 and row["status"] == "running" for row in first + second)
+    assert disclosure_queue.claim("worker-3") == []
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    disclosure_queue = DisclosureQueue(str(tmp_path / "queue.db"), lease_minutes=0.001)
+    disclosure_queue.enqueue(write_pdf(tmp_path, "2024-001.pdf", b"one"))
+    assert len(disclosure_queue.claim("worker-1")) == 1
+    time.sleep(0.1)
+    rows = disclosure_queue.claim("worker-2")
+    assert [(row["worker"], row["attempts"]) for row in rows] == [("worker-2", 2)]
+
+
+def test_fail_retries_until_max_attempts(disclosure_queue, tmp_path):
+    disclosure_queue.enqueue(write_pdf(tmp_path, "2024-001.pdf", b"one"))
+    row = disclosure_queue.claim("worker-1")[0]
+    disclosure_queue.fail(row["id"], "launch_first_ignite: timed out")
+    assert status_of(disclosure_queue, "2024-001")["status"] == "queued"
+
+    row = disclosure_queue.claim("worker-1")[0]
+    disclosure_queue.fail(row["id"], "launch_first_ignite: timed out")
+    failed = status_of(disclosure_queue, "2024-001")
+    assert (failed["status"], failed["attempts"], failed["last_error"]) == ("failed", 2, "launch_first_ignite: timed out")
+    assert disclosure_queue.claim("worker-1") == []
+
+    assert disclosure_queue.retry_failed() == 1
+    assert status_of(disclosure_queue, "2024-001")["attempts"] == 0
+
+
+def test_release_gives_the_attempt_back(disclosure_queue, tmp_path):
+    disclosure_queue.enqueue(write_pdf(tmp_path, "2024-001.pdf", b"one"))
+    for _ in range(3): # more stops than max_attempts, it must never end up failed
+        row = disclosure_queue.claim("worker-1")[0]
+        disclosure_queue.release(row["id"])
+    released = status_of(disclosure_queue, "2024-001")
+    assert (released["status"], released["attempts"], released["worker"]) == ("queued", 0, None)
+
+
+def test_finish(disclosure_queue, tmp_path):
+    disclosure_queue.enqueue(write_pdf(tmp_path, "2024-001.pdf", b"one"))
+    row = disclosure_queue.claim("worker-1")[0]
+    disclosure_queue.finish(row["id"])
+    disclosure_queue.release(row["id"]) # a finished disclosure isn't put back
+    assert disclosure_queue.counts() == {"done": 1}
+    assert disclosure_queue.backlog() == []
+
+
+def test_queued_again_gets_a_new_journal_key(disclosure_queue, tmp_path):
+    filePath = write_pdf(tmp_path, "2024-001.pdf", b"one")
+    disclosure_queue.enqueue(filePath)
+    sKey = journal_key(disclosure_queue.claim("worker-1")[0])
+    disclosure_queue.finish(status_of(disclosure_queue, "2024-001")["id"])
+    time.sleep(0.01)
+    assert disclosure_queue.enqueue(filePath, again=True)
+    assert journal_key(disclosure_queue.claim("worker-1")[0]) != sKey
+
+
+def test_queue_journal_resumes_its_own_entry(disclosure_queue, tmp_path):
+    journal = Journal(str(tmp_path / "queue_journal.jsonl"))
+    disclosure_queue.enqueue(write_pdf(tmp_path, "2024-001.pdf", b"one"))
+    row = disclosure_queue.claim("worker-1")[0]
+    QueueJournal(disclosure_queue, journal, row).record("2024-001", "launch_first_ignite")
+    assert status_of(disclosure_queue, "2024-001")["stage"] == "launch_first_ignite"
+
+    disclosure = Disclosure(row["file_path"], row["clean_id"])
+    assert not QueueJournal(disclosure_queue, journal, row).resume(disclosure, journal.load())
+    assert set(disclosure.completed) == {"launch_first_ignite"}
+
+    QueueJournal(disclosure_queue, journal, row).record("2024-001", "bs_publish")
+    assert QueueJournal(disclosure_queue, journal, row).resume(Disclosure(row["file_path"], row["clean_id"]), journal.load())
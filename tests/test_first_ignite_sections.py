@@ -0,0 +1,117 @@
+# FIRSTIGNITE SECTION CAPTURE TESTS
+    # the summary has to come from the response of the run this disclosure launched,
+    # never from the earlier runs, drafts and history the page also loads
+
+from first_ignite import find_sections, find_run_id, find_run_sections, url_has_run_id, SummaryCapture
+
+SECTIONS = {
+    "title": "Self-Healing Concrete",
+    "category": "Materials",
+    "executive_statement": "Concrete that seals its own cracks.",
+    "description": ["First paragraph.", "Second paragraph."],
+    "keyAdvantages": ["Seals cracks", "Standard equipment"],
+    "problems-solved": "Water damage",
+    "Market Applications": "Roads",
+}
+
+
+def test_find_sections_accepts_key_spellings_and_lists():
+    sections = find_sections({"data": {"result": SECTIONS}})
+    assert sections["Executive Statement"] == "Concrete that seals its own cracks."
+    assert sections["Description"] == ["First paragraph.", "Second paragraph."]
+    assert sections["Problems Solved"] == "Water damage"
+
+
+def test_find_sections_needs_every_section():
+    partial = {key: value for key, value in SECTIONS.items() if key != "description"}
+    assert find_sections([partial, {"other": 1}]) is None
+    assert find_sections("Title: text") is None
+
+
+def test_find_run_id():
+    assert find_run_id({"runId": "r-12"}) == "r-12"
+    assert find_run_id({"data": {"run": {"job_id": 7}}}) == "7"
+    assert find_run_id({"ok": True, "run_id": True}) is None # a flag, not an id
+
+
+def test_find_run_id_ignores_a_bare_id():
+    # a draft save or an upload answers with an id of its own, it isn't the launch
+    assert find_run_id({"id": 55}) is None
+    assert find_run_id({"data": {"id": "draft-1"}}) is None
+
+
+def test_url_has_run_id_matches_whole_segments_and_values():
+    assert url_has_run_id("https://app.firstignite.com/api/runs/12/result", "12")
+    assert url_has_run_id("https://app.firstignite.com/api/result?run=12&x=1", "12")
+    assert not url_has_run_id("https://app.firstignite.com/api/runs/123", "12")
+    assert not url_has_run_id("https://app.firstignite.com/api/result?run=123", "12")
+    assert not url_has_run_id("https://app.firstignite.com/api/runs?page=2", "12")
+
+
+def test_find_run_sections_by_url():
+    assert find_run_sections(SECTIONS, "12", "https://app.firstignite.com/api/runs/12")["Title"] == "Self-Healing Concrete"
+    assert find_run_sections(SECTIONS, "12", "https://app.firstignite.com/api/runs/123") is None
+
+
+def test_find_run_sections_by_id_in_a_history_list():
+    earlier = dict(SECTIONS, title="An earlier run", id=11)
+    this_run = dict(SECTIONS, id=12)
+    history = {"runs": [earlier, this_run]}
+    assert find_run_sections(history, "12")["Title"] == "Self-Healing Concrete"
+    assert find_run_sections({"runs": [earlier]}, "12") is None
+
+
+class FakeRequest:
+    def __init__(self, method):
+        self.method = method
+
+
+class FakeResponse:
+    def __init__(self, url, data, method="GET"):
+        self.url = url
+        self.data = data
+        self.request = FakeRequest(method)
+        self.headers = {"content-type": "application/json"}
+
+    def json(self):
+        return self.data
+
+
+class FakePage:
+    def __init__(self):
+        self.listeners = []
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    def receive(self, response):
+        for handler in list(self.listeners):
+            handler(response)
+
+
+def test_capture_takes_only_the_launched_run():
+    page = FakePage()
+    with SummaryCapture(page) as capture:
+        page.receive(FakeResponse("https://app.firstignite.com/api/history", {"runs": [dict(SECTIONS, id=11)]}))
+        page.receive(FakeResponse("https://app.firstignite.com/api/drafts", {"id": 99}, "POST"))
+        assert capture.sections() is None
+        page.receive(FakeResponse("https://app.firstignite.com/api/launch", {"runId": 12}, "POST"))
+        page.receive(FakeResponse("https://app.firstignite.com/api/runs/123", dict(SECTIONS, title="Another run")))
+        assert capture.sections() is None
+        page.receive(FakeResponse("https://app.firstignite.com/api/runs/12", SECTIONS))
+        assert capture.sections()["Title"] == "Self-Healing Concrete"
+    assert page.listeners == []
+
+
+def test_capture_start_twice_listens_once():
+    page = FakePage()
+    capture = SummaryCapture(page)
+    capture.start()
+    capture.start()
+    assert len(page.listeners) == 1
+    capture.stop()
+    capture.stop()
+    assert page.listeners == []
@@ -0,0 +1,82 @@
+# FORMAT_SUMMARY TESTS
+    # summary_sections has to cut the summary tab text exactly where the greedy regex it replaced did,
+    # and say which heading is missing instead of failing with an IndexError
+
+import re
+
+import pytest
+
+from formatting_functions import summary_sections, format_summary
+
+SUMMARY_REGEX = "Title:(.+)Category:(.+)Executive Statement:(.+)Description:(.+)Key Advantages:(.+)Problems Solved:(.+)Market Applications:(.+)"
+
+SUMMARY = (
+    "Title: Self-Healing Concrete"
+    "Category: Materials"
+    "Executive Statement: Concrete that seals its own cracks."
+    "Description: An additive releases a mineral that fills cracks as they form."
+    "Key Advantages: Seals cracks while they are smallMixes in with standard equipment"
+    "Problems Solved: Water damage to reinforcing steel"
+    "Market Applications: Road and bridge constructionPrecast concrete"
+)
+
+
+def regex_sections(sText):
+    return list(re.findall(SUMMARY_REGEX, sText)[0])
+
+
+def test_sections_of_a_well_formed_summary():
+    sections = summary_sections(SUMMARY)
+    assert sections[0] == " Self-Healing Concrete"
+    assert sections[3] == " An additive releases a mineral that fills cracks as they form."
+    assert sections == regex_sections(SUMMARY)
+
+
+@pytest.mark.parametrize("sText", [
+    # a heading repeated inside an earlier section, the last one counts (like the greedy regex)
+    SUMMARY.replace("as they form.", "as they form. Key Advantages: Description: none"),
+    # a heading repeated inside the last section
+    SUMMARY + " Title: again",
+    # sections of a single character
+    "Title:aCategory:bExecutive Statement:cDescription:dKey Advantages:eProblems Solved:fMarket Applications:g",
+])
+def test_matches_the_regex(sText):
+    assert summary_sections(sText) == regex_sections(sText)
+
+
+@pytest.mark.parametrize("sHeading", ["Title:", "Category:", "Description:", "Market Applications:"])
+def test_missing_heading_is_named(sHeading):
+    with pytest.raises(ValueError, match=re.escape(sHeading)):
+        summary_sections(SUMMARY.replace(sHeading, "Nothing -"))
+
+
+def test_empty_section_is_missing():
+    # the regex needs at least one character in every section
+    with pytest.raises(ValueError, match="Category:"):
+        summary_sections(SUMMARY.replace("Category: Materials", "Category:"))
+
+
+def test_format_summary_from_text():
+    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = format_summary(SUMMARY)
+    assert sTitle == " Self-Healing Concrete"
+    assert sExecutiveStatement == " Concrete that seals its own cracks."
+    assert lstAdvantages == ["Seals cracks while they are small", "Mixes in with standard equipment"]
+    assert lstProblemsSolved == ["Water damage to reinforcing steel"]
+    assert lstMarketApplications == ["Road and bridge construction", "Precast concrete"]
+
+
+def test_format_summary_from_sections():
+    sections = {
+        "Title": "Self-Healing Concrete",
+        "Executive Statement": "Concrete that seals its own cracks.",
+        "Description": ["First paragraph.", "Second paragraph."],
+        "Key Advantages": ["Seals cracks", "Standard equipment"],
+        "Problems Solved": "Water damageFrequent repairs",
+        "Market Applications": ["Roads"],
+    }
+    sTitle, sExecutiveStatement, sDescription, lstAdvantages, lstProblemsSolved, lstMarketApplications = format_summary(sections)
+    assert sTitle == "Self-Healing Concrete"
+    assert sDescription == "First paragraph.\nSecond paragraph."
+    assert lstAdvantages == ["Seals cracks", "Standard equipment"]
+    assert lstProblemsSolved == ["Water damage", "Frequent repairs"]
+    assert lstMarketApplications == ["Roads"]
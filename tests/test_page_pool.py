@@ -0,0 +1,117 @@
+# PAGE POOL TESTS
+    # pages are reused until they fail, reach max_uses, pass max_heap_mb or get closed, then replaced with a new one
+    # and no more than max_pages are ever open at once
+
+import threading
+
+import pytest
+
+from page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self, heap=0):
+        self.closed = False
+        self.heap = heap
+        self.urls = []
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def goto(self, url, timeout=None):
+        self.urls.append(url)
+
+    def evaluate(self, script):
+        return self.heap
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+def test_healthy_page_is_reset_and_reused():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=2, max_uses=10, max_heap_mb=0)
+    page = pool.acquire()
+    pool.release(page)
+    assert page.urls == ["about:blank"]
+    assert pool.acquire() is page
+    assert pool.created == 1 and pool.recycled == 0
+
+
+def test_failed_lease_replaces_the_page():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=1, max_uses=10, max_heap_mb=0)
+    with pytest.raises(RuntimeError):
+        with pool.lease() as page:
+            raise RuntimeError("the disclosure failed")
+    assert page.closed
+    assert pool.recycled == 1
+    with pool.lease() as replacement:
+        assert replacement is not page
+    assert pool.created == 2
+
+
+def test_page_is_replaced_after_max_uses():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=1, max_uses=3, max_heap_mb=0)
+    pages = []
+    for _ in range(6):
+        with pool.lease() as page:
+            pages.append(page)
+    assert pages[:3] == [pages[0]] * 3
+    assert pages[3:] == [pages[3]] * 3
+    assert pages[0] is not pages[3] and pages[0].closed
+    assert pool.recycled == 2
+
+
+def test_page_is_replaced_past_max_heap():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=1, max_uses=0, max_heap_mb=100)
+    page = pool.acquire()
+    page.heap = 150e6
+    pool.release(page)
+    assert page.closed
+    assert pool.acquire() is not page
+
+
+def test_closed_page_is_dropped():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=1, max_uses=0, max_heap_mb=0)
+    page = pool.acquire()
+    pool.release(page)
+    page.close() # crashed while it sat in the pool
+    assert pool.acquire() is not page
+
+
+def test_waits_for_a_free_page():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=1, max_uses=0, max_heap_mb=0)
+    page = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    threading.Timer(0.05, pool.release, args=(page,)).start()
+    assert pool.acquire(timeout=5) is page
+    assert len(context.pages) == 1
+
+
+def test_close_closes_every_page():
+    context = FakeContext()
+    pool = PagePool(context, max_pages=2, max_uses=0, max_heap_mb=0)
+    first = FakePage()
+    pool.add(first)
+    assert pool.acquire() is first
+    pool.release(pool.acquire())
+    pool.close()
+    assert first.closed
+    assert len(context.pages) == 1 and context.pages[0].closed
@@ -0,0 +1,66 @@
+# STAND-IN SERVER TESTS
+    # validate_request has to accept exactly the requests brightspot_api.py sends (its queries and variables)
+    # and turn away anything else (unknown fields, arguments, operations or variable types) with GraphQLValidationError
+
+import pytest
+
+from brightspot_api import BrightspotAPI, BrightspotAPIError, UPLOAD_FILE_QUERY, FIND_TAG_QUERY, SAVE_TECHNOLOGY_PAGE_QUERY
+from brightspot_standin_server import GraphQLValidationError, REQUIRED_PAGE_FIELDS, start_standin, validate_request
+
+PAGE = {field: f"<p>{field}</p>" for field in REQUIRED_PAGE_FIELDS}
+
+
+def request(operationName, query, variables):
+    return {"operationName": operationName, "query": query, "variables": variables}
+
+
+def test_accepts_the_api_queries():
+    validate_request(request("UploadFile", UPLOAD_FILE_QUERY, {"fileName": "a.pdf", "contentType": "application/pdf", "data": "YQ=="}))
+    validate_request(request("FindTag", FIND_TAG_QUERY, {"name": "Tech 2024"}))
+    validate_request(request("SaveTechnologyPage", SAVE_TECHNOLOGY_PAGE_QUERY, {"page": {**PAGE, "tags": ["1"]}, "publish": True}))
+
+
+@pytest.mark.parametrize("query", [
+    "query FindTag($name: String!) { tag(name: $name) { id name color } }", # unknown selected field
+    "query FindTag($name: String!) { tags(name: $name) { id } }", # unknown root field
+    "mutation FindTag($name: String!) { tag(name: $name) { id } }", # tag is a query, not a mutation
+    "query FindTag($name: Int!) { tag(name: $name) { id } }", # wrong variable type
+    "query FindTag($name: String!) { tag(name: $name, kind: $name) { id } }", # unknown argument
+    "query FindTag { tag { id } }", # missing required argument
+    "query FindTag($name: String!) { tag(name: $name) { id } } { tag(name: $name) { id } }", # two root fields
+    "query FindTag($name: String!) { tag(name: $name) { id ", # cut off
+])
+def test_rejects_queries_outside_the_schema(query):
+    with pytest.raises(GraphQLValidationError):
+        validate_request(request("FindTag", query, {"name": "Tech 2024"}))
+
+
+def test_rejects_mismatched_operation_name():
+    with pytest.raises(GraphQLValidationError):
+        validate_request(request("UploadFile", FIND_TAG_QUERY, {"name": "Tech 2024"}))
+
+
+def test_rejects_bad_variables():
+    with pytest.raises(GraphQLValidationError, match="not provided"):
+        validate_request(request("FindTag", FIND_TAG_QUERY, {}))
+    with pytest.raises(GraphQLValidationError, match="not defined"):
+        validate_request(request("SaveTechnologyPage", SAVE_TECHNOLOGY_PAGE_QUERY, {"page": {**PAGE, "colour": "red"}, "publish": True}))
+
+
+def test_api_round_trip():
+    server, url = start_standin()
+    try:
+        api = BrightspotAPI(url=url, client_id="id", client_secret="secret", timeout=10)
+        sell_sheet = api.upload_file("2024-001 Concrete.pdf", content=b"%PDF-1.4")
+        tag_id = api.find_tag("Tech 2024")
+        assert api.find_tag("Tech 2024") == tag_id
+        saved = api.save_technology_page({**PAGE, "displayName": "Self-Healing Concrete", "sellSheet": sell_sheet["id"], "tags": [tag_id]})
+        assert saved["published"] is True
+        assert saved["permalink"] == "/technologies/self-healing-concrete"
+        assert server.state.pages[saved["id"]]["tags"] == [tag_id]
+
+        with pytest.raises(BrightspotAPIError, match="Unknown sell sheet"):
+            api.save_technology_page({**PAGE, "sellSheet": "missing"})
+    finally:
+        server.shutdown()
+        server.server_close()
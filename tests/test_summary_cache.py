@@ -0,0 +1,88 @@
+# SUMMARY CACHE TESTS
+    # entries are keyed by the contents of the disclosure (not its name), expire after max_age_days
+    # and are written so concurrent saves never leave a broken or half written entry
+
+import json
+import os
+import threading
+import time
+
+from summary_cache import file_hash, entry_path, load_summary, save_summary, prune_cache
+
+FIELDS = ("Title", "Executive statement", "Description", ["Advantage"], ["Problem"], ["Market"])
+
+
+def write_pdf(folder, sName, content):
+    filePath = os.path.join(folder, sName)
+    with open(filePath, "wb") as f:
+        f.write(content)
+    return filePath
+
+
+def test_key_is_the_file_contents(tmp_path):
+    cache = str(tmp_path / "cache")
+    filePath = write_pdf(tmp_path, "2024-001 Concrete.pdf", b"disclosure one")
+    save_summary(filePath, "summary one", FIELDS, folder=cache)
+
+    renamed = write_pdf(tmp_path, "renamed.pdf", b"disclosure one")
+    edited = write_pdf(tmp_path, "2024-001 Concrete v2.pdf", b"disclosure one, edited")
+    assert file_hash(renamed) == file_hash(filePath)
+    assert load_summary(renamed, folder=cache)["summaryText"] == "summary one"
+    assert load_summary(edited, folder=cache) is None
+
+
+def test_entry_keeps_the_fields(tmp_path):
+    cache = str(tmp_path / "cache")
+    filePath = write_pdf(tmp_path, "2024-002.pdf", b"disclosure two")
+    save_summary(filePath, {"Title": "captured sections"}, FIELDS, folder=cache)
+    entry = load_summary(filePath, folder=cache)
+    assert entry["fields"] == FIELDS
+    assert entry["summaryText"] == {"Title": "captured sections"}
+    assert entry["fileName"] == "2024-002.pdf"
+
+
+def test_refresh_and_max_age(tmp_path):
+    cache = str(tmp_path / "cache")
+    filePath = write_pdf(tmp_path, "2024-003.pdf", b"disclosure three")
+    save_summary(filePath, "summary three", folder=cache)
+    assert load_summary(filePath, refresh=True, folder=cache) is None
+
+    path = entry_path(file_hash(filePath), cache)
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["saved"] = time.time() - 3 * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    assert load_summary(filePath, max_age_days=2, folder=cache) is None
+    assert load_summary(filePath, max_age_days=4, folder=cache)["summaryText"] == "summary three"
+    assert load_summary(filePath, max_age_days=None, folder=cache) is not None
+
+
+def test_concurrent_saves_leave_one_whole_entry(tmp_path):
+    cache = str(tmp_path / "cache")
+    filePath = write_pdf(tmp_path, "2024-004.pdf", b"disclosure four")
+    threads = [threading.Thread(target=save_summary, args=(filePath, f"summary {i}"), kwargs={"folder": cache}) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert os.listdir(cache) == [os.path.basename(entry_path(file_hash(filePath), cache))]
+    assert load_summary(filePath, folder=cache)["summaryText"].startswith("summary ")
+
+
+def test_prune_removes_old_entries_and_temp_files(tmp_path):
+    cache = str(tmp_path / "cache")
+    old = write_pdf(tmp_path, "old.pdf", b"old")
+    new = write_pdf(tmp_path, "new.pdf", b"new")
+    save_summary(old, "old summary", folder=cache)
+    save_summary(new, "new summary", folder=cache)
+    stale_temp = os.path.join(cache, "left-over.tmp")
+    open(stale_temp, "w").close()
+    long_ago = time.time() - 40 * 86400
+    for path in (entry_path(file_hash(old), cache), stale_temp):
+        os.utime(path, (long_ago, long_ago))
+
+    assert prune_cache(max_age_days=30, folder=cache) == 2
+    assert load_summary(old, folder=cache) is None
+    assert load_summary(new, folder=cache)["summaryText"] == "new summary"
+    assert prune_cache(folder=str(tmp_path / "missing")) == 0
@@ -0,0 +1,286 @@
+# WAIT FUNCTIONS
+    # Condition-based waits used instead of fixed sleep() calls
+    # watches DOM mutations and network traffic on the page so a step moves on as soon as the site is ready
+    # polls with an adaptive interval (short while the page is busy, backing off while it is idle)
+    # records how long every wait actually took in the WaitLog of the run it belongs to (see log_waits_to),
+    # so a batch or job can report the time saved for itself
+    # a wait gives up within a couple of seconds once the job it belongs to is cancelled (see cancel_waits_on)
+
+# IMPORTS
+import logging
+import threading
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import Error as PlaywrightError
+
+
+# Raised when a condition is not met in time (subclass of TimeoutError so existing except blocks still catch it)
+class WaitTimeoutError(TimeoutError):
+    pass
+
+
+# Raised by a wait when the job it belongs to has been cancelled
+class WaitCancelledError(Exception):
+    pass
+
+
+# The cancel event of the job the current thread is working for (set by cancel_waits_on)
+_job = threading.local()
+
+# Makes every wait on the current thread stop once cancel_event is set (the pipeline calls it in each worker thread)
+def cancel_waits_on(cancel_event):
+    _job.cancel_event = cancel_event
+
+# Makes every wait on the current thread add itself to wait_log (None stops logging them)
+def log_waits_to(wait_log):
+    _job.wait_log = wait_log
+
+# True once the current thread's job (or cancel_event, when given) has been cancelled
+def is_cancelled(cancel_event=None):
+    cancel_event = cancel_event or getattr(_job, "cancel_event", None)
+    return cancel_event is not None and cancel_event.is_set()
+
+# Raises WaitCancelledError if the current thread's job (or cancel_event, when given) has been cancelled
+def check_cancelled(description="the page", cancel_event=None):
+    if is_cancelled(cancel_event):
+        raise WaitCancelledError(f"Cancelled while waiting for {description}")
+
+
+# The completed waits of one run (a batch or a job) as (label, seconds), so it can report its real wait times
+    # every run makes its own, so a long running app doesn't add up the waits of every job since it started
+class WaitLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = []
+
+    def add(self, label, seconds):
+        with self.lock:
+            self.waits.append((label, seconds))
+
+    # The seconds of every wait whose label starts with prefix
+    def seconds(self, prefix=""):
+        return [seconds for label, seconds in self.labelled(prefix)]
+
+    # (label, seconds) of every wait whose label starts with prefix
+    def labelled(self, prefix=""):
+        with self.lock:
+            return [(label, seconds) for label, seconds in self.waits if label.startswith(prefix)]
+
+# Longest a wait goes without checking whether its job was cancelled
+CANCEL_CHECK_SECONDS = 2
+
+# Resource types that stay open for the life of the page and should not count as "busy"
+LONG_LIVED_TYPES = {"websocket", "eventsource", "ping"}
+
+# Installs a MutationObserver once per document and returns how many mutations it has seen
+# and how long ago (in ms) the last one happened
+# only child list and text changes are counted so blinking cursors/attribute toggles don't keep the page "busy"
+DOM_ACTIVITY_JS = """
+() => {
+    if (!window.__ttoMutations) {
+        window.__ttoMutations = {count: 0, last: performance.now()};
+        new MutationObserver((records) => {
+            window.__ttoMutations.count += records.length;
+            window.__ttoMutations.last = performance.now();
+        }).observe(document, {childList: true, subtree: true, characterData: true});
+    }
+    return {count: window.__ttoMutations.count, quiet: performance.now() - window.__ttoMutations.last};
+}
+"""
+
+
+# Keeps track of the requests a page has in flight while a wait is running
+class NetworkTracker:
+    def __init__(self, page):
+        self.page = page
+        self.inflight = set()
+        self.last_activity = time.monotonic()
+        self.events = 0
+
+    def _started(self, request):
+        if request.resource_type in LONG_LIVED_TYPES:
+            return
+        self.inflight.add(request)
+        self._touch()
+
+    def _finished(self, request):
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self._touch()
+
+    def _touch(self):
+        self.last_activity = time.monotonic()
+        self.events += 1
+
+    def quiet_for(self):
+        """Seconds since the last request started or finished (0 while anything is still loading)."""
+        if self.inflight:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+    def __enter__(self):
+        self.page.on("request", self._started)
+        self.page.on("requestfinished", self._finished)
+        self.page.on("requestfailed", self._finished)
+        return self
+
+    def __exit__(self, *exc):
+        self.page.remove_listener("request", self._started)
+        self.page.remove_listener("requestfinished", self._finished)
+        self.page.remove_listener("requestfailed", self._finished)
+        return False
+
+
+# Reads the mutation counter from the page, returns (count, seconds since last mutation)
+# returns None while the page is navigating and the script can't run
+def dom_activity(page):
+    try:
+        activity = page.evaluate(DOM_ACTIVITY_JS)
+    except PlaywrightError:
+        return None
+    return activity["count"], activity["quiet"] / 1000
+
+
+# Calls the condition and treats any error (element detached, page navigating) as "not ready yet"
+def _check(condition):
+    try:
+        return bool(condition())
+    except PlaywrightError:
+        return False
+
+
+def record_wait(label, seconds):
+    """Adds a finished wait to the current thread's wait log (if it has one) and the error log."""
+    wait_log = getattr(_job, "wait_log", None)
+    if wait_log is not None:
+        wait_log.add(label, seconds)
+    logging.info(f"{label} - ready after {seconds:.1f}s")
+
+
+# THE READINESS ENGINE
+    # waits until condition() is true, returns how many seconds it actually waited
+    # quiet -> also require that many seconds without DOM mutations or network traffic (for content that streams in)
+    # trigger -> a locator to wait on between polls so the wait ends the moment it appears instead of at the next poll
+    # the poll interval starts at min_poll, resets there whenever the page shows activity and doubles up to max_poll while idle
+    # cancel_event -> stops with WaitCancelledError at the next poll once it is set (defaults to the thread's job, see cancel_waits_on)
+def wait_until(page, condition, timeout=30, description="the page", quiet=0, trigger=None,
+               min_poll=0.25, max_poll=2.0, label=None, cancel_event=None):
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = min_poll
+    last_count = None
+    last_events = 0
+
+    with NetworkTracker(page) as network:
+        while True:
+            check_cancelled(description, cancel_event)
+            activity = dom_activity(page)
+            busy = activity is None or activity[0] != last_count or network.events != last_events
+            last_count = activity[0] if activity else None
+            last_events = network.events
+
+            ready = _check(condition)
+            if ready:
+                if not quiet or (activity is not None and activity[1] >= quiet and network.quiet_for() >= quiet):
+                    elapsed = time.monotonic() - start
+                    record_wait(label or description, elapsed)
+                    return elapsed
+
+            now = time.monotonic()
+            if now >= deadline:
+                idle = f"{activity[1]:.1f}s" if activity else "unknown"
+                raise WaitTimeoutError(
+                    f"Timed out after {timeout:.0f}s waiting for {description} "
+                    f"(last DOM change {idle} ago, {len(network.inflight)} request(s) still loading)"
+                )
+
+            # short polls while the page is changing, longer ones while it sits idle
+            interval = min_poll if busy else min(interval * 2, max_poll)
+            sleep_ms = max(1, min(interval, deadline - now) * 1000)
+            if trigger is not None and not ready:
+                try:
+                    trigger.wait_for(state="visible", timeout=sleep_ms)
+                except PlaywrightTimeoutError:
+                    pass
+            else:
+                page.wait_for_timeout(sleep_ms)
+
+
+# CONDITIONS FOR COMMON STEPS
+    # each one returns how many seconds it waited and raises WaitTimeoutError with a readable message
+
+# Waits for an element to become visible (or hidden with state="hidden")
+    # waits in slices of at most CANCEL_CHECK_SECONDS so a cancelled job doesn't sit out the whole timeout
+def wait_for_visible(locator, timeout=30, description="the element", state="visible", label=None):
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+        check_cancelled(description)
+        remaining = deadline - time.monotonic()
+        try:
+            locator.wait_for(state=state, timeout=max(1, min(remaining, CANCEL_CHECK_SECONDS) * 1000))
+            break
+        except PlaywrightTimeoutError:
+            if remaining <= CANCEL_CHECK_SECONDS:
+                raise WaitTimeoutError(f"Timed out after {timeout:.0f}s waiting for {description} to be {state}") from None
+    elapsed = time.monotonic() - start
+    record_wait(label or description, elapsed)
+    return elapsed
+
+
+# Waits for a ProseMirror rich text editor to be mounted and editable
+def wait_for_editor(page, editor, timeout=30, description="the rich text editor", label=None):
+    return wait_until(page, lambda: editor.is_visible() and editor.get_attribute("contenteditable") == "true",
+                      timeout=timeout, description=description, trigger=editor, label=label)
+
+
+# Runs action() then waits until every POST/PUT request it started has finished (file uploads)
+    # raises if one of those requests fails
+def wait_for_upload(page, action, timeout=120, description="the upload", label=None):
+    uploads = []
+    finished = set()
+    failed = []
+
+    def started(request):
+        if request.method in ("POST", "PUT"):
+            uploads.append(request)
+
+    def done(request):
+        finished.add(request)
+
+    def errored(request):
+        if request in uploads:
+            failed.append(request)
+
+    page.on("request", started)
+    page.on("requestfinished", done)
+    page.on("requestfailed", errored)
+    try:
+        action()
+        elapsed = wait_until(page, lambda: failed or all(request in finished for request in uploads),
+                             timeout=timeout, description=description, quiet=0.5, label=label)
+    finally:
+        page.remove_listener("request", started)
+        page.remove_listener("requestfinished", done)
+        page.remove_listener("requestfailed", errored)
+
+    if failed:
+        raise RuntimeError(f"{description} failed: {failed[0].url} ({failed[0].failure})")
+    return elapsed
+
+
+# Runs action() and waits for the first response matching predicate(response), returns the response
+    # raises if the server answers with an error status
+def wait_for_response(page, action, predicate, timeout=60, description="the server response", label=None):
+    start = time.monotonic()
+    try:
+        with page.expect_response(predicate, timeout=timeout * 1000) as response_info:
+            action()
+    except PlaywrightTimeoutError:
+        raise WaitTimeoutError(f"Timed out after {timeout:.0f}s waiting for {description}") from None
+    response = response_info.value
+    record_wait(label or description, time.monotonic() - start)
+    if response.status >= 400:
+        raise RuntimeError(f"{description} failed with HTTP {response.status}")
+    return response